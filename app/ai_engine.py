@@ -1,10 +1,44 @@
-"""AI engine: expand semantic tokens to natural language via Groq."""
-
+"""AI engine: expand semantic tokens to natural language via Groq.
+
+With streaming on, the completion is requested with stream=True and its
+text is passed to on_chunk piece by piece as it arrives, so output can start
+before generation finishes; on_result still gets the whole cleaned result.
+
+With a cache (expansion_cache.ExpansionCache), repeated requests are
+answered from it without calling the API.
+
+In speculative mode, speculate() is told about every buffer change; once
+the buffer has been stable for speculate_debounce seconds, a background
+thread expands it. If the user then sends that same buffer, the speculative
+result (finished or still in flight) is used instead of a new request.
+Speculations of buffers that have since changed are aborted. Speculative
+traffic is capped: one request at a time, none while a real request is
+running, and at most speculate_per_minute starts per minute.
+
+expand() only queues a request and returns its sequence number, so the
+user can keep writing while earlier sentences are expanded. Requests are
+sent one after another, each with the context turns of every request
+queued before it (which a request sent alongside them couldn't have), and
+the cache and speculation keys are built from that same context. Callbacks
+get the sequence number as their last argument and come in sequence order.
+
+The client is created and its connection opened at start(), so the first
+expansion doesn't pay for DNS, TCP and TLS setup. While the keyboard is
+enabled, an idle connection is kept open with a cheap request (listing
+models) every keepalive_interval seconds; pool_size caps the connections
+kept for the expansion and speculation requests.
+"""
+
+import collections
 import queue
 import threading
+import time
 
-from groq import Groq
+import httpx
+from groq import Groq, DefaultHttpxClient
 from config import get_groq_api_key
+from expansion_cache import cache_key
+import log
 
 SYSTEM_PROMPT = """You are a semantic-to-text expander. Your ONLY job is to output the expanded text—nothing else. No explanations, no reasoning, no commentary. Just the final sentence.
 
@@ -48,6 +82,8 @@ PREPOSITIONS: IN, ON, AT, TO, FROM, WITH, BY, FOR, OF, ABOUT, UP, DOWN, OUT, INT
 
 TECH: DEBUG, TEST, BUILD, RUN, DEPLOY, COMMIT, PUSH, PULL, MERGE, BRANCH, INSTALL, UPDATE, UPGRADE, CONFIGURE, INITIALIZE, SERVER, CLIENT, DATABASE, API, ENDPOINT, REQUEST, RESPONSE, QUERY, CACHE, LOG, VARIABLE, FUNCTION, CLASS, ERROR, EXCEPTION
 
+PHRASES: PULL_REQUEST, ERROR_MESSAGE, GOOD_MORNING, LET_ME_KNOW, SEE_YOU_SOON, ASAP
+
 ## Composability Rules
 - Use NOT with any token for negation: "CAN NOT" → "can't", "WILL NOT" → "won't"
 - Use MORE/LESS with adjectives: "MORE GOOD" → "better", "MORE BAD" → "worse"
@@ -94,34 +130,137 @@ WE SHOULD WALK TOGETHER TO OFFICE MORNING → We should walk together to the off
 MAKE backspace KEEP REMOVE WHEN HOLD → Make the backspace key keep removing when holding."""
 
 
+MODEL = "llama-3.3-70b-versatile"
+TEMPERATURE = 0.4
+MAX_TOKENS = 512
+
+# Tokens that refer back to earlier turns. Buffers without any expand the
+# same whatever the conversation context, so their cache key leaves it out
+# (otherwise the rolling context would make every key unique).
+CONTEXT_TOKENS = frozenset({
+    'IT', 'HE', 'SHE', 'THEY', 'HIM', 'HER', 'HIS', 'THEM', 'THEIR',
+    'AGAIN', 'SAME', 'PREVIOUS', 'CONTINUE', 'UNDO', 'REPROMPT',
+    'ALSO', 'TOO', 'INSTEAD',
+})
+
+
+SPECULATE_MIN_TOKENS = 2  # Shorter buffers aren't worth a speculative request
+
+
+def clean_result(text):
+    """Strip whitespace and quotes the model wraps around its output."""
+    text = text.strip()
+    if text.startswith('"') and text.endswith('"'):
+        text = text[1:-1]
+    return text
+
+
+class _Speculation:
+    """Background expansion of a buffer the user hasn't sent (yet)."""
+
+    __slots__ = ('tokens', 'key', 'result', 'done', 'adopted')
+
+    def __init__(self, tokens, key):
+        self.tokens = tokens
+        self.key = key          # _request_key when it was started
+        self.result = None      # Cleaned result once done (None if failed/aborted)
+        self.done = threading.Event()
+        self.adopted = False    # Sent by the user: never abort
+
+
 class AIEngine:
     """Background worker that expands semantic tokens via Groq."""
 
     MAX_CONTEXT_TURNS = 5  # Rolling context window size
 
-    def __init__(self, on_result, on_error, on_context_change=None, on_language_change=None):
+    def __init__(self, on_result, on_error, on_context_change=None, on_language_change=None,
+                 on_chunk=None, stream=False, cache=None,
+                 speculative=False, speculate_debounce=0.4, speculate_per_minute=20,
+                 pool_size=4, keepalive_interval=30.0, warm_up=True):
         self.on_result = on_result
         self.on_error = on_error
+        self.on_chunk = on_chunk  # Streamed text pieces (stream=True only)
+        self.stream = stream and on_chunk is not None
+        self.cache = cache  # ExpansionCache, or None
         self.on_context_change = on_context_change  # Called when context size changes
         self.on_language_change = on_language_change  # Called when language changes
         self._queue = queue.Queue()
         self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._next_seq = 0  # Sequence number of the next expand()
         self._client = None
+        self._client_lock = threading.Lock()
         self._api_key = get_groq_api_key()
+        # Connection warm-up and keep-alive
+        self.pool_size = pool_size
+        self.keepalive_interval = keepalive_interval  # 0: warm up only
+        self.warm_up = warm_up
+        self.warmed = threading.Event()  # Set once the warm-up request is done
+        self._enabled = False            # Keyboard on: keep the connection open
+        self._last_used = 0.0            # time.monotonic() of the last request
+        self._wake = threading.Event()
+        self._stopped = False
+        self._keepalive_thread = threading.Thread(target=self._keepalive, daemon=True)
+        # Speculative expansion
+        self.speculative = speculative and bool(self._api_key)
+        self.speculate_debounce = speculate_debounce
+        self.speculate_per_minute = speculate_per_minute
+        self._spec_cond = threading.Condition()
+        self._spec_wanted = None    # Latest buffer from speculate(), not started yet
+        self._spec_noted = 0.0      # ... and when it was noted
+        self._spec_current = None   # _Speculation of the latest buffer
+        self._spec_starts = collections.deque()  # Start times in the last minute
+        self._outstanding = 0       # Real requests queued or running
+        self._spec_thread = threading.Thread(target=self._speculator, daemon=True)
         # Conversation context: list of (tokens, result) tuples
         self._context = []
-        self._pending_tokens = None  # Track tokens for context storage
         # Language setting
         self._language = 'English'
         self._language_code = 'EN'
+        self._prompt_hints = ''  # Extra vocabulary notes from vocab packs
 
     def start(self):
         self._thread.start()
+        if self.speculative:
+            self._spec_thread.start()
+        if self._api_key and (self.warm_up or self.keepalive_interval > 0):
+            self._keepalive_thread.start()
+
+    def set_enabled(self, enabled):
+        """Keyboard turned on/off: keep-alive pings run only while on."""
+        self._enabled = enabled
+        self._wake.set()
 
     def expand(self, tokens_text):
-        """Queue token text for AI expansion."""
-        self._pending_tokens = tokens_text
-        self._queue.put(tokens_text)
+        """Queue token text for AI expansion; returns its sequence number."""
+        spec = None
+        with self._spec_cond:
+            seq = self._next_seq
+            self._next_seq += 1
+            self._outstanding += 1
+            if self.speculative:
+                self._spec_wanted = None
+                current = self._spec_current
+                if current is not None and current.tokens == tokens_text:
+                    # Claim it now, before a new buffer can mark it stale
+                    current.adopted = True
+                    spec = current
+                self._spec_current = None
+        self._queue.put((seq, tokens_text, spec))
+        return seq
+
+    def speculate(self, tokens_text):
+        """Note the current (unsent) buffer for speculative expansion."""
+        if not self.speculative:
+            return
+        with self._spec_cond:
+            current = self._spec_current
+            if current is not None and current.tokens == tokens_text:
+                self._spec_wanted = None  # Back to what is already speculated
+                return
+            self._spec_current = None     # Stale: aborted at its next chunk
+            self._spec_wanted = tokens_text
+            self._spec_noted = time.monotonic()
+            self._spec_cond.notify()
 
     # Keep old method name for compatibility
     def convert(self, text):
@@ -152,6 +291,10 @@ class AIEngine:
         """Get current language code."""
         return self._language_code
 
+    def set_prompt_hints(self, hints):
+        """Set extra vocabulary notes appended to the system prompt."""
+        self._prompt_hints = hints
+
     def set_raw_mode(self, enabled):
         pass  # Not used in semantic mode
 
@@ -171,10 +314,16 @@ You MUST output the expanded text in {self._language}.
         else:
             system_content = SYSTEM_PROMPT
 
+        if self._prompt_hints:
+            system_content += f"""
+
+## Additional Tokens
+{self._prompt_hints}"""
+
         messages = [{"role": "system", "content": system_content}]
 
         # Add context history as conversation turns
-        for prev_tokens, prev_result in self._context:
+        for prev_tokens, prev_result in tuple(self._context):
             messages.append({"role": "user", "content": prev_tokens})
             messages.append({"role": "assistant", "content": prev_result})
 
@@ -191,41 +340,215 @@ You MUST output the expanded text in {self._language}.
         if self.on_context_change:
             self.on_context_change(len(self._context))
 
+    def _get_client(self):
+        with self._client_lock:
+            if self._client is None:
+                # Idle connections outlive the gap between pings
+                limits = httpx.Limits(max_connections=self.pool_size,
+                                      max_keepalive_connections=self.pool_size,
+                                      keepalive_expiry=max(5.0, 2 * self.keepalive_interval))
+                self._client = Groq(api_key=self._api_key,
+                                    http_client=DefaultHttpxClient(limits=limits))
+            self._last_used = time.monotonic()
+            return self._client
+
+    def _cache_key(self, tokens):
+        context = self._context if CONTEXT_TOKENS.intersection(tokens.split()) else ()
+        return cache_key(tokens, self._language_code, MODEL, TEMPERATURE,
+                         context, self._prompt_hints)
+
+    def _request_key(self, tokens):
+        """Identifies a request's full input (a speculation must match it)."""
+        return cache_key(tokens, self._language_code, MODEL, TEMPERATURE,
+                         tuple(self._context), self._prompt_hints)
+
     def _worker(self):
         while True:
-            tokens = self._queue.get()
-            if tokens is None:
+            item = self._queue.get()
+            if item is None:
                 break
-
-            if not self._api_key:
-                # No API key - just return tokens as-is
-                self.on_result(tokens)
-                continue
-
+            seq, tokens, spec = item
             try:
-                if self._client is None:
-                    self._client = Groq(api_key=self._api_key)
-
+                self._expand(seq, tokens, spec)
+            finally:
+                with self._spec_cond:
+                    self._outstanding -= 1
+                    self._spec_cond.notify()
+
+    def _expand(self, seq, tokens, spec):
+        key = None
+        if self.cache is not None:
+            key = self._cache_key(tokens)
+            result = self.cache.get(key)
+            if result is not None:
+                self._finish(seq, tokens, result)
+                return
+
+        if not self._api_key:
+            # No API key - just return tokens as-is
+            self._finish(seq, tokens, tokens, context=False)
+            return
+
+        try:
+            result = None
+            if spec is not None:
+                spec.done.wait()
+                if spec.key == self._request_key(tokens):
+                    result = spec.result  # None if it failed: request normally
+                    log.debug("Speculation %s: %s", 'hit' if result else 'failed', tokens)
+
+            if result is None:
                 messages = self._build_messages(tokens)
+                if self.stream:
+                    result = self._stream(messages, lambda text: self.on_chunk(text, seq))
+                else:
+                    response = self._get_client().chat.completions.create(
+                        messages=messages,
+                        model=MODEL,
+                        temperature=TEMPERATURE,
+                        max_tokens=MAX_TOKENS,
+                    )
+                    result = clean_result(response.choices[0].message.content)
+
+            if key is not None and result:
+                self.cache.put(key, result)
+
+        except Exception as e:
+            self._finish(seq, tokens, error=str(e))
+            return
+
+        self._finish(seq, tokens, result)
+
+    def _finish(self, seq, tokens, result=None, error=None, context=True):
+        if error is not None:
+            self.on_error(tokens, error, seq)
+            return
+        # Add to context before calling on_result
+        if context:
+            self._add_to_context(tokens, result)
+        self.on_result(result, seq)
+
+    def _stream(self, messages, on_chunk=None, stale=None):
+        """Stream a completion, passing text to on_chunk; returns the cleaned
+        result, or None if stale() turned true and the request was aborted.
+
+        Pieces are cleaned as they go: leading whitespace and an opening
+        quote are dropped, and trailing whitespace/quotes are held back until
+        more text follows them, so the pieces usually add up to exactly
+        clean_result(full text).
+        """
+        response = self._get_client().chat.completions.create(
+            messages=messages,
+            model=MODEL,
+            temperature=TEMPERATURE,
+            max_tokens=MAX_TOKENS,
+            stream=True,
+        )
+        parts = []
+        held = ''  # Trailing text that may turn out to be closing whitespace/quotes
+        started = False
+        for chunk in response:
+            if stale is not None and stale():
+                response.close()
+                return None
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            parts.append(delta)
+            if on_chunk is None:
+                continue
+            if not started:
+                delta = delta.lstrip()
+                if not delta:
+                    continue
+                started = True
+                if delta.startswith('"'):
+                    delta = delta[1:]
+            text = held + delta
+            keep = len(text.rstrip('" \t\r\n'))
+            if keep:
+                on_chunk(text[:keep])
+            held = text[keep:]
+        return clean_result(''.join(parts))
+
+    # ==================== KEEP-ALIVE ====================
+
+    def _keepalive(self):
+        """Warm the client up, then ping while enabled and idle."""
+        if self.warm_up:
+            self._ping()  # Client construction, DNS, TCP and TLS
+            self.warmed.set()
+        interval = self.keepalive_interval
+        if interval <= 0:
+            return
+        while True:
+            if self._enabled:
+                wait = self._last_used + interval - time.monotonic()
+                if wait <= 0:
+                    self._ping()
+                    continue
+            else:
+                wait = None
+            self._wake.wait(wait)
+            self._wake.clear()
+            if self._stopped:
+                return
+
+    def _ping(self):
+        try:
+            self._get_client().models.list()
+        except Exception as e:
+            self._last_used = time.monotonic()  # Retry after an interval
+            log.debug("Keep-alive request failed: %s", e)
+
+    # ==================== SPECULATION ====================
+
+    def _speculator(self):
+        while True:
+            with self._spec_cond:
+                # Wait for a buffer that has been stable for the debounce,
+                # while no real request is queued or running
+                while True:
+                    tokens = self._spec_wanted
+                    if tokens is None or self._outstanding:
+                        self._spec_cond.wait()
+                        continue
+                    wait = self._spec_noted + self.speculate_debounce - time.monotonic()
+                    if wait <= 0:
+                        break
+                    self._spec_cond.wait(wait)
+                self._spec_wanted = None
+                if not self._speculation_allowed(tokens):
+                    continue
+                spec = _Speculation(tokens, self._request_key(tokens))
+                self._spec_current = spec
 
-                response = self._client.chat.completions.create(
-                    messages=messages,
-                    model="llama-3.3-70b-versatile",
-                    temperature=0.4,
-                    max_tokens=512,
-                )
-                result = response.choices[0].message.content.strip()
-                # Strip quotes if model adds them
-                if result.startswith('"') and result.endswith('"'):
-                    result = result[1:-1]
-
-                # Add to context before calling on_result
-                self._add_to_context(tokens, result)
-
-                self.on_result(result)
-
+            try:
+                spec.result = self._stream(self._build_messages(tokens),
+                                           stale=lambda: not spec.adopted and self._spec_current is not spec)
             except Exception as e:
-                self.on_error(tokens, str(e))
+                log.debug("Speculation error: %s", e)
+            finally:
+                spec.done.set()
+
+    def _speculation_allowed(self, tokens):
+        """Budget and usefulness checks before starting a speculation."""
+        if len(tokens.split()) < SPECULATE_MIN_TOKENS:
+            return False
+        if self.cache is not None and self._cache_key(tokens) in self.cache:
+            return False  # Sending it will hit the cache anyway
+        now = time.monotonic()
+        starts = self._spec_starts
+        while starts and now - starts[0] > 60:
+            starts.popleft()
+        if len(starts) >= self.speculate_per_minute:
+            return False
+        starts.append(now)
+        return True
 
     def stop(self):
         self._queue.put(None)
+        self._stopped = True
+        self._wake.set()
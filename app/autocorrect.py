@@ -0,0 +1,94 @@
+"""Invalid-chord autocorrection: nearest valid chords by Hamming distance.
+
+A chord that misses by a finger or two produces a code with no token. The
+corrector looks that code up in a precomputed neighbor table (for every
+code, the token chords at the smallest Hamming distance up to
+MAX_DISTANCE), scores the candidates with the next-token model, and either
+commits a clear winner or returns the candidates to offer in the overlay.
+Control and arrow chords take part in the search: a code at least as close to
+one of them as to any token is left uncorrected, so a send or undo chord
+with a finger missing never turns into a token.
+"""
+
+from itertools import combinations
+
+from chord_engine import (
+    ARROW_ACTIONS, CHORD_CODE_COUNT, CONTROL_ACTIONS, TOKEN_CHORDS, VOCAB_LOCK,
+    add_vocab_listener,
+)
+
+MAX_DISTANCE = 2
+
+CORRECT_OFF = 'off'
+CORRECT_SUGGEST = 'suggest'  # Offer candidates in the overlay
+CORRECT_COMMIT = 'commit'    # Type a clear winner, else suggest
+
+# XOR masks for every code at distance 1..MAX_DISTANCE, nearest first
+_FLIPS = [
+    [sum(1 << b for b in bits) for bits in combinations(range(10), d)]
+    for d in range(1, MAX_DISTANCE + 1)
+]
+
+
+def _nearest(code):
+    """Token codes at the smallest distance from code (empty if none, or if
+    a control chord is that close too)."""
+    for flips in _FLIPS:
+        near = [code ^ f for f in flips]
+        if any(c in CONTROL_ACTIONS or c in ARROW_ACTIONS for c in near):
+            return ()
+        found = tuple(c for c in near if c in TOKEN_CHORDS)
+        if found:
+            return found
+    return ()
+
+
+class ChordCorrector:
+    """Nearest-chord lookup with context scoring.
+
+    predictor is an optional NgramModel; without one only unambiguous
+    corrections are committed. In commit mode the best candidate is typed
+    when it is the only one or scores at least margin times the runner-up.
+    """
+
+    def __init__(self, predictor=None, mode=CORRECT_SUGGEST, margin=2.0):
+        if mode not in (CORRECT_SUGGEST, CORRECT_COMMIT):
+            raise ValueError(f"Unknown correction mode: {mode}")
+        self.predictor = predictor
+        self.mode = mode
+        self.margin = margin
+        with VOCAB_LOCK:
+            self.neighbors = [_nearest(code) for code in range(CHORD_CODE_COUNT)]
+            add_vocab_listener(self._on_vocab_change)
+
+    def _on_vocab_change(self, changes):
+        """Recompute entries within MAX_DISTANCE of each changed code."""
+        dirty = set()
+        for code, _, _ in changes:
+            dirty.add(code)
+            for flips in _FLIPS:
+                dirty.update(code ^ f for f in flips)
+        for code in dirty:
+            self.neighbors[code] = _nearest(code)
+
+    def candidates(self, code, context=()):
+        """(score, code, chord, token) for the nearest chords, best first."""
+        scores = self.predictor.distribution(context) if self.predictor else {}
+        ranked = []
+        with VOCAB_LOCK:
+            for near in self.neighbors[code]:
+                chord, token = TOKEN_CHORDS[near]
+                ranked.append((scores.get(token, 0.0), near, chord, token))
+        ranked.sort(key=lambda x: (-x[0], x[3]))
+        return ranked
+
+    def correct(self, code, context=()):
+        """Returns (code to commit or None, (chord, token) suggestions)."""
+        ranked = self.candidates(code, context)
+        if not ranked:
+            return None, ()
+        if self.mode == CORRECT_COMMIT:
+            best = ranked[0]
+            if len(ranked) == 1 or best[0] > 0 and best[0] >= self.margin * ranked[1][0]:
+                return best[1], ()
+        return None, tuple((chord, token) for _, _, chord, token in ranked)
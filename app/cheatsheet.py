@@ -3,7 +3,7 @@
 import tkinter as tk
 from tkinter import ttk
 
-from chord_engine import SEMANTICS, TOKEN_TO_CHORD, CONSONANTS, VOWELS
+from chord_engine import TOKEN_TO_CHORD, CONSONANTS, VOWELS
 
 
 # Organize tokens by category for display
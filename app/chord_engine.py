@@ -3,6 +3,12 @@
 Outputs tokens as typed text, AI replaces on all-10-keys chord.
 """
 
+import os
+import threading
+import time
+
+from vocab_compiler import read_artifact, vocab_key
+
 # Bit positions for each key
 LEFT_KEYS = {'c': 4, 'f': 3, 'd': 2, 's': 1, 'a': 0}
 RIGHT_KEYS = {'m': 4, 'j': 3, 'k': 2, 'l': 1, ';': 0}
@@ -261,6 +267,31 @@ SEMANTICS = {
     'A+D+S+M+K+L+;': 'ERROR', 'A+D+S+M+J+K+L+;': 'EXCEPTION',
 }
 
+# =============================================================================
+# CHORD CODES
+# =============================================================================
+# A chord is a 10-bit code: (left_code << 5) | right_code.
+
+CHORD_CODE_COUNT = 1 << 10
+
+
+def chord_code(left_code, right_code):
+    """Combine left/right 5-bit codes into a table index."""
+    return (left_code << 5) | right_code
+
+
+def parse_chord(chord):
+    """Convert a chord string like 'A+S+M+J' to its 10-bit code."""
+    code = 0
+    for part in chord.split('+'):
+        key = part.lower()
+        if key in LEFT_KEYS:
+            code |= 1 << (LEFT_KEYS[key] + 5)
+        elif key in RIGHT_KEYS:
+            code |= 1 << RIGHT_KEYS[key]
+    return code
+
+
 # Build normalized lookup (sort keys for consistent matching)
 def _sort_keys(keys, order):
     return sorted(keys, key=lambda k: order.index(k) if k in order else 99)
@@ -270,140 +301,504 @@ def _normalize_chord(left_keys, right_keys):
     sr = _sort_keys(right_keys, RIGHT_KEY_ORDER)
     return '+'.join(sl) + '+' + '+'.join(sr)
 
-SEMANTICS_LOOKUP = {}
-for chord, token in SEMANTICS.items():
+
+def _normalize_chord_string(chord):
     parts = chord.split('+')
     left = [p for p in parts if p in LEFT_KEY_ORDER]
     right = [p for p in parts if p in RIGHT_KEY_ORDER]
-    norm = _normalize_chord(left, right)
-    SEMANTICS_LOOKUP[norm] = token
+    return _normalize_chord(left, right)
 
-# Reverse lookup for cheatsheet
-TOKEN_TO_CHORD = {v: k for k, v in SEMANTICS.items()}
 
+def _compile_entries(semantics):
+    """(code, chord, normalized chord, token) for each vocabulary entry."""
+    return [(parse_chord(chord), chord, _normalize_chord_string(chord), token)
+            for chord, token in semantics.items()]
 
-class ChordEngine:
-    """State machine for chord detection in semantic/text modes."""
+
+# Compiled entries come from the vocab.bin artifact when it was built from
+# SEMANTICS as it is now (see vocab_compiler.py); otherwise compile here. The
+# artifact is only written by vocab_compiler.
+VOCAB_ARTIFACT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'vocab.bin')
+VOCAB_ENTRIES = read_artifact(VOCAB_ARTIFACT, vocab_key(SEMANTICS))
+if VOCAB_ENTRIES is None:
+    VOCAB_ENTRIES = _compile_entries(SEMANTICS)
+
+SEMANTICS_LOOKUP = {norm: token for _, _, norm, token in VOCAB_ENTRIES}
+
+# =============================================================================
+# PRECOMPILED ACTION TABLES
+# =============================================================================
+# Each mode gets a 1024-entry table mapping every chord code straight to the
+# tuple _fire_chord returns, so resolving a chord inside the hook callback is
+# one list index with no string building or allocation.
+
+INVALID_ACTION = ('invalid',)
+
+# Control chords (checked before vocabulary in both modes)
+CONTROL_ACTIONS = {
+    chord_code(31, 31): ('send_ai',),        # All 10 keys
+    chord_code(16, 1): ('backspace',),       # C+;
+    chord_code(16, 16): ('enter',),          # C+M
+    chord_code(16, 8): ('search',),          # C+J
+    chord_code(18, 16): ('toggle_mode',),    # S+C+M
+    chord_code(16, 20): ('cheatsheet',),     # C+M+K
+    chord_code(16, 17): ('clear_context',),  # C+M+;
+    chord_code(16, 2): ('language',),        # C+L
+}
+
+# Arrow keys: J/K/L/; = left/down/up/right (vim shifted right), no left keys
+ARROW_ACTIONS = {
+    chord_code(0, 8): ('arrow', 'left'),
+    chord_code(0, 4): ('arrow', 'down'),
+    chord_code(0, 2): ('arrow', 'up'),
+    chord_code(0, 1): ('arrow', 'right'),
+}
+
+# Bit of each key within the 10-bit chord code, in layout order
+KEY_BITS = {k.lower(): 1 << (LEFT_KEYS[k.lower()] + 5) for k in LEFT_KEY_ORDER}
+KEY_BITS.update({k.lower(): 1 << RIGHT_KEYS[k.lower()] for k in RIGHT_KEY_ORDER})
+
+
+def _build_code_keys():
+    """Chord keys (layout order) for every code, each extending a smaller one."""
+    tuples = [()] * CHORD_CODE_COUNT
+    codes = [0]
+    for key, bit in KEY_BITS.items():
+        for code in codes[:]:
+            tuples[code | bit] = tuples[code] + (key,)
+            codes.append(code | bit)
+    return tuples
+
+
+CODE_KEYS = _build_code_keys()
+
+# Key set for every code so UI consumers get a set view without the engine
+# building one.
+MASK_KEYS = [frozenset(keys) for keys in CODE_KEYS]
+
+
+def _build_action_table(mode):
+    if mode == 'semantic':
+        table = [INVALID_ACTION] * CHORD_CODE_COUNT
+        for code, _, _, token in VOCAB_ENTRIES:
+            if code >> 5 and code & 31:  # Tokens need both hands
+                table[code] = ('token', token)
+    else:
+        # Text mode types chord keys back as characters, in layout order
+        table = [('type_chars', keys) for keys in CODE_KEYS]
+        table[0] = INVALID_ACTION
+    for code, action in ARROW_ACTIONS.items():
+        table[code] = action
+    for code, action in CONTROL_ACTIONS.items():
+        table[code] = action
+    return table
+
+
+SEMANTIC_ACTIONS = _build_action_table('semantic')
+TEXT_ACTIONS = _build_action_table('text')
+
+# Built-in entry for each code (later SEMANTICS entries win, like the table)
+_BASE_CHORDS = {code: (chord, token) for code, chord, _, token in VOCAB_ENTRIES}
+
+# Effective vocabulary: code -> (chord, token) for every chord that actually
+# produces its token (not shadowed by a control chord or a later entry).
+# Shared by the overlay, search popup and cheatsheet; vocabulary packs update
+# it in place under VOCAB_LOCK.
+TOKEN_CHORDS = {
+    code: entry for code, entry in _BASE_CHORDS.items()
+    if SEMANTIC_ACTIONS[code] == ('token', entry[1])
+}
+
+# Every chord for each token; TOKEN_TO_CHORD keeps the first reachable one
+TOKEN_TO_CHORDS = {}
+for chord, token in TOKEN_CHORDS.values():
+    TOKEN_TO_CHORDS.setdefault(token, []).append(chord)
+TOKEN_TO_CHORD = {token: chords[0] for token, chords in TOKEN_TO_CHORDS.items()}
+
+VOCAB_LOCK = threading.RLock()
+
+
+def find_completions(held_mask):
+    """Vocabulary chords that contain every held key.
+
+    Returns unsorted (remaining_key_count, chord, token, remaining_mask).
+    """
+    with VOCAB_LOCK:
+        return [((code & ~held_mask).bit_count(), chord, token, code & ~held_mask)
+                for code, (chord, token) in TOKEN_CHORDS.items()
+                if code & held_mask == held_mask]
+
+
+# =============================================================================
+# VOCABULARY PACKS
+# =============================================================================
+# Extra chord -> token mappings layered over SEMANTICS (see vocab_packs.py).
+# Packs win over the built-in vocabulary, and between packs the name (path)
+# that sorts last wins, so precedence doesn't depend on load or edit order;
+# control chords and arrows always win. Changing a pack only rebuilds the
+# entries for the codes it touches.
+
+_PACK_CHORDS = {}       # pack name -> {code: (chord, token)}
+_vocab_listeners = []
+
+
+def add_vocab_listener(callback):
+    """Call callback(changes) after pack updates, under VOCAB_LOCK.
+
+    changes is a list of (code, old, new) with old/new a (chord, token)
+    pair or None.
+    """
+    _vocab_listeners.append(callback)
+
+
+def _resolve_code(code):
+    if code in CONTROL_ACTIONS or code in ARROW_ACTIONS:
+        return None
+    for name in sorted(_PACK_CHORDS, reverse=True):
+        chords = _PACK_CHORDS[name]
+        if code in chords:
+            return chords[code]
+    return _BASE_CHORDS.get(code)
+
+
+def _apply_code(code, old, new):
+    if old is not None:
+        chord, token = old
+        del TOKEN_CHORDS[code]
+        SEMANTICS_LOOKUP.pop(_normalize_chord_string(chord), None)
+        chords = TOKEN_TO_CHORDS[token]
+        chords.remove(chord)
+        if chords:
+            TOKEN_TO_CHORD[token] = chords[0]
+        else:
+            del TOKEN_TO_CHORDS[token]
+            del TOKEN_TO_CHORD[token]
+    if new is not None:
+        chord, token = new
+        TOKEN_CHORDS[code] = new
+        SEMANTICS_LOOKUP[_normalize_chord_string(chord)] = token
+        TOKEN_TO_CHORDS.setdefault(token, []).append(chord)
+        TOKEN_TO_CHORD.setdefault(token, chord)
+        SEMANTIC_ACTIONS[code] = ('token', token)
+    else:
+        SEMANTIC_ACTIONS[code] = INVALID_ACTION
+
+
+def set_pack(name, chords):
+    """Install or replace pack name ({chord: token}); None removes it.
+
+    Returns the list of (code, old, new) changes that were applied.
+    """
+    entries = {}
+    for chord, token in (chords or {}).items():
+        code = parse_chord(chord)
+        if code >> 5 and code & 31:
+            entries[code] = (chord, token)
+    with VOCAB_LOCK:
+        previous = _PACK_CHORDS.pop(name, {})
+        if chords is not None:
+            _PACK_CHORDS[name] = entries
+        changes = []
+        for code in previous.keys() | entries.keys():
+            old = TOKEN_CHORDS.get(code)
+            new = _resolve_code(code)
+            if old != new:
+                _apply_code(code, old, new)
+                changes.append((code, old, new))
+        if changes:
+            for callback in _vocab_listeners:
+                callback(changes)
+    return changes
+
+# =============================================================================
+# MULTI-STROKE SEQUENCES
+# =============================================================================
+# A sequence of token chords maps to a token or phrase. Every stroke still
+# types its own token immediately; when the final stroke lands, the tokens
+# typed by the earlier strokes are replaced by the phrase. Consecutive strokes
+# must land within the engine's sequence_timeout to continue a sequence.
+#
+# None ship by default: a sequence made of everyday tokens (e.g. TELL then
+# ME) would stop them from being typed literally one after the other. Add
+# entries for token runs you never want to keep as typed, e.g.
+#     ('A+D+S+K+L', 'A+D+S+M+J+L'): 'PULL_REQUEST',  # PULL REQUEST
+
+SEQUENCES = {}
+
+
+class _StrokeNode:
+    """Trie node keyed by chord code."""
+
+    __slots__ = ('children', 'phrase', 'continuations')
 
     def __init__(self):
-        self.held_keys = set()
-        self.chord_buffer = set()
+        self.children = {}
+        self.phrase = None        # Set if a sequence ends here
+        self.continuations = []   # (remaining chords, phrase) below this node
+
+
+def _build_stroke_trie(sequences):
+    root = _StrokeNode()
+    for chords, phrase in sequences.items():
+        node = root
+        for depth, chord in enumerate(chords):
+            code = parse_chord(chord)
+            if SEMANTIC_ACTIONS[code][0] != 'token':
+                raise ValueError(f"Sequence {chords} uses non-token chord {chord}")
+            node = node.children.setdefault(code, _StrokeNode())
+            if depth + 1 < len(chords):
+                node.continuations.append((' / '.join(chords[depth + 1:]), phrase))
+        node.phrase = phrase
+    return root
+
+
+STROKE_TRIE = _build_stroke_trie(SEQUENCES)
+
+
+# Firing modes: when a chord is committed
+FIRE_ALL_UP = 'all_up'      # Every key released (default)
+FIRE_FIRST_UP = 'first_up'  # First chorded key released (allows rollover)
+
+# Actions that repeat while their chord is held (see ChordEngine.poll_repeat)
+REPEAT_ACTIONS = frozenset({'arrow', 'backspace'})
+
+
+class ChordEngine:
+    """State machine for chord detection in semantic/text modes.
+
+    Held and chorded keys are kept as 10-bit masks in chord code layout;
+    held_keys/chord_buffer expose them as (shared, immutable) key sets.
+
+    In first_up mode a chord fires on its first key release, and keys still
+    held afterwards are left out of the next chord (rollover). With a
+    rollover_window (seconds), keys still held when the next chord starts
+    more than that long after the fire are treated as deliberately held and
+    join it.
+
+    Semantic strokes also advance through STROKE_TRIE; completing a sequence
+    returns ('sequence', phrase, replaced_tokens) instead of a token.
+
+    With a corrector (autocorrect.ChordCorrector), a semantic chord with no
+    action is replaced by its nearest token chord when the corrector commits
+    one, or returns ('suggest', ((chord, token), ...)) for the overlay.
+
+    With a repeat_delay (seconds), holding exactly a REPEAT_ACTIONS chord
+    (an arrow, or backspace while the buffers are empty) repeats its key:
+    poll_repeat returns ('repeat', key) once the chord has been held
+    repeat_delay seconds, then every repeat_interval seconds after. Repeats
+    only tap the key; they never edit the buffers. Timing follows the event
+    timestamps, not OS key repeat. A chord that has repeated doesn't fire
+    again on release, unless keys were added to it after repeating.
+    """
+
+    __slots__ = (
+        'held_mask', 'chord_mask', 'chord_active',
+        'token_buffer', 'mode', 'text_buffer',
+        'fire_mode', 'rollover_window', '_fired_at',
+        'sequence_timeout', '_seq_node', '_seq_tokens', '_seq_time',
+        'corrector',
+        'repeat_delay', 'repeat_interval', '_repeat_action', '_repeat_due', '_repeated_mask',
+    )
+
+    def __init__(self, fire_mode=FIRE_ALL_UP, rollover_window=None,
+                 sequence_timeout=1.0, corrector=None,
+                 repeat_delay=None, repeat_interval=0.05):
+        if fire_mode not in (FIRE_ALL_UP, FIRE_FIRST_UP):
+            raise ValueError(f"Unknown fire mode: {fire_mode}")
+        self.held_mask = 0
+        self.chord_mask = 0
         self.chord_active = False
         self.token_buffer = []  # List of tokens (strings)
         self.mode = 'semantic'  # 'semantic' or 'text'
         self.text_buffer = []   # Characters typed in text mode
+        self.fire_mode = fire_mode
+        self.rollover_window = rollover_window
+        self._fired_at = 0.0    # Timestamp of the last first_up fire
+        self.sequence_timeout = sequence_timeout
+        self._seq_node = None   # Current STROKE_TRIE node, None at root
+        self._seq_tokens = []   # token_buffer entries typed along the path
+        self._seq_time = 0.0    # Timestamp of the last sequence stroke
+        self.corrector = corrector
+        self.repeat_delay = repeat_delay
+        self.repeat_interval = repeat_interval
+        self._repeat_action = None  # ('repeat', key) while held, if any
+        self._repeat_due = 0.0      # Timestamp of its next repeat
+        self._repeated_mask = 0     # Held mask that repeated in this chord
+
+    @property
+    def held_keys(self):
+        return MASK_KEYS[self.held_mask]
+
+    @property
+    def chord_buffer(self):
+        return MASK_KEYS[self.chord_mask]
 
     def is_chord_key(self, key):
         return key in ALL_CHORD_KEYS
 
-    def key_down(self, key):
-        if key not in ALL_CHORD_KEYS:
-            return
-        if key in self.held_keys:
+    def key_down(self, key, timestamp=None):
+        bit = KEY_BITS.get(key)
+        if bit is None or self.held_mask & bit:
             return
         if not self.chord_active:
             self.chord_active = True
-            self.chord_buffer.clear()
-        self.held_keys.add(key)
-        self.chord_buffer.add(key)
+            self.chord_mask = 0
+            self._repeated_mask = 0
+            # first_up: keys left over from the previous chord join this one
+            # only if they were held past the rollover window
+            if self.held_mask and self.rollover_window is not None:
+                if timestamp is None:
+                    timestamp = time.monotonic()
+                if timestamp - self._fired_at > self.rollover_window:
+                    self.chord_mask = self.held_mask
+        self.held_mask |= bit
+        self.chord_mask |= bit
+        if self.repeat_delay is not None:
+            self._arm_repeat(timestamp)
+
+    def _arm_repeat(self, timestamp):
+        """Arm a repeat if the keys held are exactly a repeating chord."""
+        self._repeat_action = None
+        table = SEMANTIC_ACTIONS if self.mode == 'semantic' else TEXT_ACTIONS
+        action = table[self.held_mask]
+        if action[0] not in REPEAT_ACTIONS:
+            return
+        if action[0] == 'arrow':
+            key = action[1]
+        elif self.token_buffer or self.text_buffer:
+            return  # Backspace edits the buffer: no raw repeats over it
+        else:
+            key = 'backspace'
+        self._repeat_action = ('repeat', key)
+        self._repeat_due = (time.monotonic() if timestamp is None else timestamp) + self.repeat_delay
 
-    def key_up(self, key):
-        """Returns result when all keys released."""
-        if key not in ALL_CHORD_KEYS:
-            return None
-        self.held_keys.discard(key)
+    @property
+    def repeat_due(self):
+        """Timestamp of the next repeat, or None if nothing is repeating."""
+        return None if self._repeat_action is None else self._repeat_due
 
-        if self.chord_active and len(self.held_keys) == 0:
-            result = self._fire_chord()
-            self.chord_active = False
-            self.chord_buffer.clear()
-            return result
-        return None
+    def poll_repeat(self, timestamp):
+        """('repeat', key) if the held chord's repeat is due at timestamp,
+        else None.
 
-    def _get_codes(self):
-        left = sum(1 << LEFT_KEYS[k] for k in self.chord_buffer if k in LEFT_KEYS)
-        right = sum(1 << RIGHT_KEYS[k] for k in self.chord_buffer if k in RIGHT_KEYS)
-        return left, right
+        Each call returns at most one repeat; call again to catch up.
+        """
+        action = self._repeat_action
+        if action is None or timestamp < self._repeat_due:
+            return None
+        self._repeat_due += self.repeat_interval
+        self._repeated_mask = self.held_mask
+        self._seq_node = None
+        return action
+
+    def key_up(self, key, timestamp=None):
+        """Returns result when the chord fires (see fire_mode)."""
+        bit = KEY_BITS.get(key)
+        if bit is None:
+            return None
+        self.held_mask &= ~bit
+        self._repeat_action = None  # Chord no longer fully held
+        if not self.chord_active:
+            return None
 
-    def _get_chord_key(self):
-        left = [k.upper() for k in self.chord_buffer if k in LEFT_KEYS]
-        right = [k.upper() if k != ';' else ';' for k in self.chord_buffer if k in RIGHT_KEYS]
-        if not left or not right:
+        if self.fire_mode == FIRE_FIRST_UP:
+            if not self.chord_mask & bit:
+                return None  # Rolled-over key from the previous chord
+            if self.rollover_window is not None:
+                self._fired_at = time.monotonic() if timestamp is None else timestamp
+        elif self.held_mask:
             return None
-        return _normalize_chord(left, right)
-
-    def _fire_chord(self):
-        left_code, right_code = self._get_codes()
-
-        # Control: All 10 keys = send to AI
-        if left_code == 31 and right_code == 31:  # All keys: 1+2+4+8+16=31
-            return ('send_ai',)
-
-        # Control: C+; = backspace (left thumb + right pinky)
-        if left_code == 16 and right_code == 1:  # C=16, ;=1
-            return ('backspace',)
-
-        # Control: C+M = enter (both thumbs)
-        if left_code == 16 and right_code == 16:  # C=16, M=16
-            return ('enter',)
-
-        # Control: C+J = search popup (left thumb + right index)
-        if left_code == 16 and right_code == 8:  # C=16, J=8
-            return ('search',)
-
-        # Control: S+C+M = toggle mode
-        if left_code == 18 and right_code == 16:  # S+C = 2+16=18, M=16
-            return ('toggle_mode',)
-
-        # Control: C+M+K = show cheatsheet
-        if left_code == 16 and right_code == 20:  # C=16, M+K=16+4=20
-            return ('cheatsheet',)
-
-        # Control: C+M+; = clear context (new conversation)
-        if left_code == 16 and right_code == 17:  # C=16, M+;=16+1=17
-            return ('clear_context',)
-
-        # Control: C+L = language selector (left thumb + right ring)
-        if left_code == 16 and right_code == 2:  # C=16, L=2
-            return ('language',)
-
-        # Arrow keys: J/K/L/; = left/down/up/right (vim shifted right)
-        # Single right-hand keys only (no left-hand keys needed)
-        if left_code == 0:
-            if right_code == 8:  # J = left
-                return ('arrow', 'left')
-            if right_code == 4:  # K = down
-                return ('arrow', 'down')
-            if right_code == 2:  # L = up
-                return ('arrow', 'up')
-            if right_code == 1:  # ; = right
-                return ('arrow', 'right')
 
-        if self.mode == 'semantic':
-            return self._fire_semantic()
+        if self._repeated_mask and self.chord_mask == self._repeated_mask:
+            result = None  # Already acted on while held
         else:
-            return self._fire_text_mode(left_code, right_code)
-
-    def _fire_semantic(self):
-        chord_key = self._get_chord_key()
-        if chord_key and chord_key in SEMANTICS_LOOKUP:
-            token = SEMANTICS_LOOKUP[chord_key]
-            self.token_buffer.append(token)
-            return ('token', token)
-        return ('invalid',)
-
-    def _fire_text_mode(self, left_code, right_code):
-        # Text mode: type the chord keys as regular characters
-        # This handles cases where user presses chord keys in text mode
-        keys = []
-        for k in self.chord_buffer:
-            if k == ';':
-                keys.append(';')
+            result = self._fire_chord(timestamp)
+        self.chord_active = False
+        self.chord_mask = 0
+        return result
+
+    def feed(self, events):
+        """Replay (key, is_down, timestamp) events, yielding chord results.
+
+        Drives the engine without the keyboard hook, e.g. to replay
+        recorded sessions on headless machines. Results are the same tuples
+        key_up returns, plus ('repeat', key) auto-repeats due before each
+        event's timestamp;
+        events that don't fire a chord yield nothing.
+        """
+        key_down = self.key_down
+        key_up = self.key_up
+        poll_repeat = self.poll_repeat
+        for key, is_down, timestamp in events:
+            if self._repeat_action is not None:
+                repeat = poll_repeat(timestamp)
+                while repeat is not None:
+                    yield repeat
+                    repeat = poll_repeat(timestamp)
+            if is_down:
+                key_down(key, timestamp)
             else:
-                keys.append(k.lower())
-        if keys:
-            return ('type_chars', keys)
-        return ('invalid',)
+                result = key_up(key, timestamp)
+                if result is not None:
+                    yield result
+
+    def _fire_chord(self, timestamp=None):
+        if self.mode != 'semantic':
+            return TEXT_ACTIONS[self.chord_mask]
+        code = self.chord_mask
+        action = SEMANTIC_ACTIONS[code]
+        if action is INVALID_ACTION and self.corrector is not None:
+            code, suggestions = self.corrector.correct(code, self.token_buffer[-2:])
+            if code is None:
+                self._seq_node = None
+                return ('suggest', suggestions) if suggestions else action
+            action = SEMANTIC_ACTIONS[code]
+        if action[0] != 'token':
+            self._seq_node = None
+            return action
+        return self._advance_sequence(code, action, timestamp)
+
+    def _advance_sequence(self, code, action, timestamp):
+        node = self._seq_node
+        nxt = None
+        if node is not None:
+            if timestamp is None:
+                timestamp = time.monotonic()
+            # Path must still be the tail of the buffer and within the timeout
+            n = len(self._seq_tokens)
+            if (timestamp - self._seq_time <= self.sequence_timeout
+                    and self.token_buffer[-n:] == self._seq_tokens):
+                nxt = node.children.get(code)
+        if nxt is None:
+            nxt = STROKE_TRIE.children.get(code)
+            self._seq_tokens = []
+            if nxt is None:
+                self._seq_node = None
+                self.token_buffer.append(action[1])
+                return action
+        if timestamp is None:
+            timestamp = time.monotonic()
+        self._seq_node = nxt
+        self._seq_time = timestamp
+
+        if nxt.phrase is None:
+            self.token_buffer.append(action[1])
+            self._seq_tokens.append(action[1])
+            return action
+
+        # Sequence complete: replace the tokens typed along the path
+        replaced = tuple(self._seq_tokens)
+        if replaced:
+            del self.token_buffer[-len(replaced):]
+        self.token_buffer.append(nxt.phrase)
+        self._seq_tokens = [nxt.phrase]
+        return ('sequence', nxt.phrase, replaced)
+
+    def pending_sequences(self):
+        """(remaining chords, phrase) pairs continuing the current strokes."""
+        if self._seq_node is None:
+            return []
+        return self._seq_node.continuations
 
     def toggle_mode(self):
         """Switch between semantic and text modes.
@@ -412,6 +807,7 @@ class ChordEngine:
         - UPPERCASE = semantic tokens
         - lowercase = regular text (typed via QWERTY)
         """
+        self._seq_node = None
         if self.mode == 'semantic':
             # Switching to text mode - finalize any pending text
             self.mode = 'text'
@@ -441,13 +837,22 @@ class ChordEngine:
 
     def pop_last_token(self):
         """Remove last token. Returns (token, is_special)."""
+        self._seq_node = None
         if self.token_buffer:
             token = self.token_buffer.pop()
             return token, False
         return None, False
 
+    def buffer_text(self):
+        """The text flush_buffer would return, without flushing."""
+        parts = self.token_buffer
+        if self.text_buffer:
+            parts = parts + [''.join(self.text_buffer)]
+        return ' '.join(parts)
+
     def flush_buffer(self):
         """Get all tokens for AI conversion. Returns (text, char_count)."""
+        self._seq_node = None
         # Include any pending text from text mode
         if self.text_buffer:
             text = ''.join(self.text_buffer)
@@ -470,9 +875,11 @@ class ChordEngine:
         return ' '.join(parts)
 
     def reset(self):
-        self.held_keys.clear()
-        self.chord_buffer.clear()
+        self.held_mask = 0
+        self.chord_mask = 0
         self.chord_active = False
         self.token_buffer.clear()
         self.text_buffer.clear()
         self.mode = 'semantic'
+        self._seq_node = None
+        self._repeat_action = None
@@ -0,0 +1,135 @@
+"""Clipboard backends for paste injection (see injection.PasteInjector).
+
+Only text is saved and restored, so text_only() tells the injector whether
+the clipboard can be borrowed: while it holds anything else (an image,
+files, rich text) output is typed instead.
+"""
+
+import ctypes
+import time
+
+
+class MemoryClipboard:
+    """In-process fake clipboard, for tests."""
+
+    def __init__(self, text=None, non_text=False):
+        self.text = text
+        self.non_text = non_text  # Pretend to hold other formats as well
+        self.history = []  # Every value set, in order
+
+    def text_only(self):
+        return not self.non_text
+
+    def get(self):
+        return self.text
+
+    def set(self, text):
+        self.history.append(text)
+        self.text = text
+
+
+class Win32Clipboard:
+    """CF_UNICODETEXT via user32/kernel32."""
+
+    CF_UNICODETEXT = 13
+    GMEM_MOVEABLE = 0x2
+    # CF_TEXT, CF_OEMTEXT, CF_UNICODETEXT and CF_LOCALE, which Windows
+    # synthesizes from each other: all restored by restoring the text
+    TEXT_FORMATS = frozenset({1, 7, 13, 16})
+
+    def __init__(self, open_retries=10):
+        self.open_retries = open_retries
+        self._user32 = user32 = ctypes.windll.user32
+        self._kernel32 = kernel32 = ctypes.windll.kernel32
+        user32.OpenClipboard.argtypes = [ctypes.c_void_p]
+        user32.EnumClipboardFormats.argtypes = [ctypes.c_uint]
+        user32.EnumClipboardFormats.restype = ctypes.c_uint
+        user32.GetClipboardData.restype = ctypes.c_void_p
+        user32.SetClipboardData.argtypes = [ctypes.c_uint, ctypes.c_void_p]
+        user32.SetClipboardData.restype = ctypes.c_void_p
+        kernel32.GlobalAlloc.argtypes = [ctypes.c_uint, ctypes.c_size_t]
+        kernel32.GlobalAlloc.restype = ctypes.c_void_p
+        kernel32.GlobalLock.argtypes = [ctypes.c_void_p]
+        kernel32.GlobalLock.restype = ctypes.c_void_p
+        kernel32.GlobalUnlock.argtypes = [ctypes.c_void_p]
+        kernel32.GlobalFree.argtypes = [ctypes.c_void_p]
+
+    def _open(self):
+        # Another process may hold the clipboard briefly
+        for _ in range(self.open_retries):
+            if self._user32.OpenClipboard(None):
+                return
+            time.sleep(0.01)
+        raise OSError("Clipboard is locked by another process")
+
+    def text_only(self):
+        """True if the clipboard is empty or holds nothing but text."""
+        self._open()
+        try:
+            fmt = 0
+            while True:
+                fmt = self._user32.EnumClipboardFormats(fmt)
+                if not fmt:
+                    return True
+                if fmt not in self.TEXT_FORMATS:
+                    return False
+        finally:
+            self._user32.CloseClipboard()
+
+    def get(self):
+        self._open()
+        try:
+            if not self._user32.IsClipboardFormatAvailable(self.CF_UNICODETEXT):
+                return None
+            handle = self._user32.GetClipboardData(self.CF_UNICODETEXT)
+            if not handle:
+                return None
+            pointer = self._kernel32.GlobalLock(handle)
+            if not pointer:
+                return None
+            try:
+                return ctypes.wstring_at(pointer)
+            finally:
+                self._kernel32.GlobalUnlock(handle)
+        finally:
+            self._user32.CloseClipboard()
+
+    def set(self, text):
+        """Set text; None empties the clipboard. Raises OSError (leaving the
+        clipboard as it was) if the text can't be allocated."""
+        handle = None
+        if text is not None:
+            # Fill the memory before emptying the clipboard
+            data = text.encode('utf-16-le') + b'\0\0'
+            handle = self._kernel32.GlobalAlloc(self.GMEM_MOVEABLE, len(data))
+            if not handle:
+                raise OSError("GlobalAlloc failed for clipboard text")
+            pointer = self._kernel32.GlobalLock(handle)
+            if not pointer:
+                self._kernel32.GlobalFree(handle)
+                raise OSError("GlobalLock failed for clipboard text")
+            ctypes.memmove(pointer, data, len(data))
+            self._kernel32.GlobalUnlock(handle)
+        try:
+            self._open()
+        except OSError:
+            if handle:
+                self._kernel32.GlobalFree(handle)
+            raise
+        try:
+            self._user32.EmptyClipboard()
+            # The clipboard owns the memory once this succeeds
+            if handle and not self._user32.SetClipboardData(self.CF_UNICODETEXT, handle):
+                self._kernel32.GlobalFree(handle)
+                raise OSError("SetClipboardData failed")
+        finally:
+            self._user32.CloseClipboard()
+
+
+def create_clipboard(spec):
+    """Build a clipboard from 'win32' or 'memory'."""
+    if spec == 'win32':
+        return Win32Clipboard()
+    if spec == 'memory':
+        return MemoryClipboard()
+    raise ValueError(f"Unknown clipboard: {spec}")
@@ -1,6 +1,7 @@
 """Configuration: VK codes, constants, and API key loading."""
 
 import os
+import sys
 
 # Try to load .env file if python-dotenv is available
 try:
@@ -14,6 +15,151 @@ def get_groq_api_key():
     return os.environ.get("GROQ_API_KEY", "")
 
 
+def get_ai_stream():
+    """Stream AI expansions, typing them as they arrive (default off)."""
+    return os.environ.get("CHORD_AI_STREAM", "0") not in ("", "0")
+
+
+def get_ai_pool_size():
+    """Max HTTP connections the AI client keeps open."""
+    return max(1, int(os.environ.get("CHORD_AI_POOL_SIZE", "4")))
+
+
+def get_ai_keepalive():
+    """Seconds between keep-alive pings of an idle connection (0 disables)."""
+    return float(os.environ.get("CHORD_AI_KEEPALIVE", "30"))
+
+
+def get_speculate():
+    """Expand the buffer in the background before it is sent (default off)."""
+    return os.environ.get("CHORD_SPECULATE", "0") not in ("", "0")
+
+
+def get_speculate_debounce():
+    """Seconds the buffer must stay unchanged before a speculative expansion."""
+    return float(os.environ.get("CHORD_SPECULATE_DEBOUNCE", "0.4"))
+
+
+def get_speculate_per_minute():
+    """Max speculative requests started per minute."""
+    return int(os.environ.get("CHORD_SPECULATE_PER_MINUTE", "20"))
+
+
+def get_cache_path():
+    """SQLite file for the expansion cache ('' keeps it in memory only)."""
+    default = os.path.join(os.path.expanduser("~"), ".chord_keyboard", "expansions.db")
+    return os.environ.get("CHORD_CACHE_PATH", default)
+
+
+def get_cache_size():
+    """Max cached expansions (0, the default, disables the cache)."""
+    return int(os.environ.get("CHORD_CACHE_SIZE", "0"))
+
+
+def get_fire_mode():
+    """Chord firing mode: 'all_up' (default) or 'first_up'."""
+    return os.environ.get("CHORD_FIRE_MODE", "all_up")
+
+
+def get_rollover_window():
+    """first_up rollover window in seconds, or None to always drop held keys."""
+    value = os.environ.get("CHORD_ROLLOVER_WINDOW", "")
+    return float(value) if value else None
+
+
+def get_sequence_timeout():
+    """Max seconds between strokes of a multi-stroke sequence."""
+    return float(os.environ.get("CHORD_SEQUENCE_TIMEOUT", "1.0"))
+
+
+def get_repeat_delay():
+    """Seconds an arrow/backspace chord is held before it auto-repeats.
+
+    Empty (the default) disables auto-repeat; 0.4 is a typical delay.
+    """
+    value = os.environ.get("CHORD_REPEAT_DELAY", "")
+    return float(value) if value else None
+
+
+def get_repeat_rate():
+    """Auto-repeats per second once a held chord starts repeating."""
+    return float(os.environ.get("CHORD_REPEAT_RATE", "20"))
+
+
+def get_ghost_buffer():
+    """Keep tokens off-screen (overlay only) until the expansion is typed."""
+    return os.environ.get("CHORD_GHOST_BUFFER", "0") not in ("", "0")
+
+
+def get_event_source():
+    """Keyboard event source: 'win32', 'evdev[:device]' or 'replay:path'."""
+    default = "win32" if sys.platform == "win32" else "evdev"
+    return os.environ.get("CHORD_EVENT_SOURCE", default)
+
+
+def get_injector():
+    """Keystroke injection backend: 'sendinput', 'pynput' or 'recording'."""
+    default = "sendinput" if sys.platform == "win32" else "pynput"
+    return os.environ.get("CHORD_INJECTOR", default)
+
+
+def get_inject_pacing():
+    """Seconds between injected chunks/keys, or None for the backend default."""
+    value = os.environ.get("CHORD_INJECT_PACING", "")
+    return float(value) if value else None
+
+
+def get_inject_chunk():
+    """Max key events per SendInput call, or None for whole edits."""
+    value = os.environ.get("CHORD_INJECT_CHUNK", "")
+    return int(value) if value else None
+
+
+def get_paste_threshold():
+    """Outputs at least this many characters are pasted via the clipboard.
+
+    None (default) always types.
+    """
+    value = os.environ.get("CHORD_PASTE_THRESHOLD", "")
+    return int(value) if value else None
+
+
+def get_clipboard():
+    """Clipboard backend for paste injection: 'win32' or 'memory' (fake).
+
+    Empty when the platform has no system clipboard backend.
+    """
+    default = "win32" if sys.platform == "win32" else ""
+    return os.environ.get("CHORD_CLIPBOARD", default)
+
+
+def get_log_level():
+    """Minimum log level: DEBUG, INFO (default), WARNING or ERROR."""
+    return os.environ.get("CHORD_LOG_LEVEL", "INFO")
+
+
+def get_autocorrect_mode():
+    """Invalid-chord correction: 'off' (default), 'suggest' or 'commit'."""
+    return os.environ.get("CHORD_AUTOCORRECT", "off")
+
+
+def get_ngram_path():
+    """File where the next-token n-gram model is persisted ('', the default,
+    keeps it in memory for the session)."""
+    return os.environ.get("CHORD_NGRAM_PATH", "")
+
+
+def get_ngram_size():
+    """Max n-gram entries kept by the next-token model."""
+    return int(os.environ.get("CHORD_NGRAM_SIZE", "20000"))
+
+
+def get_pack_dir():
+    """Directory watched for vocabulary packs (.json/.toml)."""
+    default = os.path.join(os.path.dirname(os.path.abspath(__file__)), "packs")
+    return os.environ.get("CHORD_PACK_DIR", default)
+
+
 # Windows Virtual Key codes for chord keys
 # Left hand: A(pinky) S(ring) D(mid) F(index) C(thumb)
 # Right hand: M(thumb) J(index) K(mid) L(ring) ;(pinky)
@@ -36,7 +182,8 @@ VK_Q_TOGGLE = 0x51
 # LLKHF_INJECTED flag — set on keystrokes we inject ourselves
 LLKHF_INJECTED = 0x10
 
-# Map VK codes to internal key names
+# Map VK codes to internal key names (US layout; other layouts map the same
+# physical keys, see keymap.py)
 VK_TO_KEY = {
     VK_A: 'a',
     VK_S: 's',
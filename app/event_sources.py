@@ -0,0 +1,293 @@
+"""Keyboard event sources: where KeyboardHook gets its key events from.
+
+A source delivers every physical key press/release to a handler
+
+    handler(vk, is_down, timestamp, injected) -> bool
+
+with vk a Windows virtual-key code (the key space config.py uses on every
+platform), timestamp in seconds and injected True for keystrokes synthesized
+by software. Returning True suppresses the key; otherwise it reaches the
+focused application. key_state(vk) answers "is this key down right now" for
+modifier checks; the generic Shift/Ctrl/Alt codes match either side.
+keymap() returns the keymap.Keymap for the active keyboard layout.
+
+Backends:
+  Win32Source   low-level Windows hook via pynput (default on Windows)
+  EvdevSource   grabs a Linux input device, re-emits passed keys via uinput
+  ReplaySource  replays recorded events from a file, recording decisions
+"""
+
+import json
+import threading
+import time
+
+import log
+from config import LLKHF_INJECTED
+from keymap import US_KEYMAP, win32_keymap, win32_layout
+
+# Generic modifier VKs and the side-specific codes they stand for
+_GENERIC_MODIFIERS = {
+    0x10: (0xA0, 0xA1),  # Shift
+    0x11: (0xA2, 0xA3),  # Ctrl
+    0x12: (0xA4, 0xA5),  # Alt
+}
+
+
+class EventSource:
+    """Base class: key event delivery plus key state queries."""
+
+    def start(self, handler):
+        raise NotImplementedError
+
+    def stop(self):
+        pass
+
+    def key_state(self, vk):
+        raise NotImplementedError
+
+    def keymap(self):
+        """Key tables for the active layout (VKs here are US positions)."""
+        return US_KEYMAP
+
+
+class _TrackedSource(EventSource):
+    """Source that tracks key state from the events it delivers."""
+
+    def __init__(self):
+        self._down = set()
+
+    def _track(self, vk, is_down):
+        if is_down:
+            self._down.add(vk)
+        else:
+            self._down.discard(vk)
+
+    def key_state(self, vk):
+        sides = _GENERIC_MODIFIERS.get(vk)
+        if sides is not None:
+            return sides[0] in self._down or sides[1] in self._down
+        return vk in self._down
+
+
+# =============================================================================
+# WINDOWS
+# =============================================================================
+
+class Win32Source(EventSource):
+    """pynput low-level hook; suppression via win32_event_filter."""
+
+    _DOWN_MSGS = (0x100, 0x104)  # WM_KEYDOWN, WM_SYSKEYDOWN
+    _UP_MSGS = (0x101, 0x105)    # WM_KEYUP, WM_SYSKEYUP
+
+    def __init__(self):
+        import ctypes
+        self._user32 = ctypes.windll.user32
+        self._user32.GetAsyncKeyState.argtypes = [ctypes.c_int]
+        self._user32.GetAsyncKeyState.restype = ctypes.c_short
+        self._listener = None
+        self._handler = None
+
+    def start(self, handler):
+        from pynput import keyboard
+        self._handler = handler
+        self._listener = keyboard.Listener(
+            on_press=self._noop,
+            on_release=self._noop,
+            win32_event_filter=self._filter,
+        )
+        self._listener.start()
+
+    def stop(self):
+        if self._listener:
+            self._listener.stop()
+
+    def key_state(self, vk):
+        return bool(self._user32.GetAsyncKeyState(vk) & 0x8000)
+
+    def keymap(self):
+        # The layout is per thread: follow the foreground window's
+        return win32_keymap(win32_layout())
+
+    @staticmethod
+    def _noop(key):
+        pass
+
+    def _filter(self, msg, data):
+        # suppress_event() raises SuppressException, which must propagate
+        # out of the filter to actually suppress the key
+        if msg in self._DOWN_MSGS:
+            is_down = True
+        elif msg in self._UP_MSGS:
+            is_down = False
+        else:
+            return
+        # Hook timestamps are milliseconds since boot
+        if self._handler(data.vkCode, is_down, data.time / 1000.0,
+                         bool(data.flags & LLKHF_INJECTED)):
+            self._listener.suppress_event()
+
+
+# =============================================================================
+# LINUX (evdev/uinput)
+# =============================================================================
+
+# evdev key names -> VK codes for keys the hook distinguishes
+_EVDEV_VK_NAMES = {f'KEY_{c}': ord(c) for c in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'}
+_EVDEV_VK_NAMES.update({f'KEY_F{n}': 0x6F + n for n in range(1, 13)})
+_EVDEV_VK_NAMES.update({
+    'KEY_SEMICOLON': 0xBA, 'KEY_EQUAL': 0xBB, 'KEY_COMMA': 0xBC,
+    'KEY_MINUS': 0xBD, 'KEY_DOT': 0xBE, 'KEY_SLASH': 0xBF, 'KEY_GRAVE': 0xC0,
+    'KEY_LEFTBRACE': 0xDB, 'KEY_BACKSLASH': 0xDC, 'KEY_RIGHTBRACE': 0xDD,
+    'KEY_APOSTROPHE': 0xDE,
+    'KEY_BACKSPACE': 0x08, 'KEY_TAB': 0x09, 'KEY_ENTER': 0x0D, 'KEY_ESC': 0x1B,
+    'KEY_SPACE': 0x20, 'KEY_CAPSLOCK': 0x14, 'KEY_NUMLOCK': 0x90,
+    'KEY_SCROLLLOCK': 0x91, 'KEY_SYSRQ': 0x2C, 'KEY_INSERT': 0x2D,
+    'KEY_DELETE': 0x2E, 'KEY_LEFT': 0x25, 'KEY_UP': 0x26, 'KEY_RIGHT': 0x27,
+    'KEY_DOWN': 0x28,
+    'KEY_LEFTSHIFT': 0xA0, 'KEY_RIGHTSHIFT': 0xA1,
+    'KEY_LEFTCTRL': 0xA2, 'KEY_RIGHTCTRL': 0xA3,
+    'KEY_LEFTALT': 0xA4, 'KEY_RIGHTALT': 0xA5,
+    'KEY_LEFTMETA': 0x5B, 'KEY_RIGHTMETA': 0x5C,
+})
+
+
+class EvdevSource(_TrackedSource):
+    """Exclusive grab of a Linux keyboard device (needs python-evdev).
+
+    Events the handler doesn't suppress are written to a uinput device, so
+    the rest of the system still sees them. Keys with no VK mapping are
+    always passed through. Kernel auto-repeat arrives as repeated downs,
+    like on Windows.
+    """
+
+    def __init__(self, device_path=None):
+        super().__init__()
+        import evdev
+        self._evdev = evdev
+        self.device = evdev.InputDevice(device_path or self._find_keyboard())
+        self._vk = {evdev.ecodes.ecodes[name]: vk
+                    for name, vk in _EVDEV_VK_NAMES.items()}
+        self._uinput = None
+        self._handler = None
+        self._thread = None
+        self._running = False
+
+    def _find_keyboard(self):
+        """First device that has the chord keys."""
+        ecodes = self._evdev.ecodes
+        wanted = {ecodes.KEY_A, ecodes.KEY_J, ecodes.KEY_SEMICOLON}
+        for path in self._evdev.list_devices():
+            device = self._evdev.InputDevice(path)
+            keys = device.capabilities().get(ecodes.EV_KEY, [])
+            if wanted.issubset(keys):
+                return path
+        raise RuntimeError("No keyboard found in /dev/input (need read access)")
+
+    def start(self, handler):
+        self._handler = handler
+        self._uinput = self._evdev.UInput.from_device(self.device, name='chord-keyboard-passthrough')
+        self.device.grab()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        try:
+            self.device.ungrab()
+        except OSError:
+            pass
+        if self._uinput:
+            self._uinput.close()
+
+    def _run(self):
+        EV_KEY = self._evdev.ecodes.EV_KEY
+        try:
+            for event in self.device.read_loop():
+                if not self._running:
+                    break
+                if event.type == EV_KEY:
+                    vk = self._vk.get(event.code)
+                    if vk is not None:
+                        is_down = event.value != 0  # 1 press, 2 repeat, 0 release
+                        self._track(vk, is_down)
+                        if self._handler(vk, is_down, event.timestamp(), False):
+                            continue
+                # Pass through (including SYN/MSC events)
+                self._uinput.write_event(event)
+        except OSError as e:
+            if self._running:
+                log.error("evdev read error: %s", e)
+
+
+# =============================================================================
+# REPLAY
+# =============================================================================
+
+def read_events(path):
+    """Recorded events: one JSON [vk, is_down, timestamp] per line."""
+    with open(path, encoding='utf-8') as f:
+        return [(vk, bool(down), t) for vk, down, t in
+                (json.loads(line) for line in f if line.strip())]
+
+
+class ReplaySource(_TrackedSource):
+    """Replays recorded (vk, is_down, timestamp) events through the handler.
+
+    Every delivery is recorded in results as (vk, is_down, suppressed,
+    handler_ns), so hook decisions and per-event latency can be checked
+    without a real keyboard. realtime=True sleeps to reproduce the recorded
+    timing (needed for behavior that depends on wall-clock time).
+    """
+
+    def __init__(self, events, realtime=False):
+        super().__init__()
+        if isinstance(events, str):
+            events = read_events(events)
+        self.events = [(vk, bool(down), t) for vk, down, t in events]
+        self.realtime = realtime
+        self.results = []
+        self.done = threading.Event()
+        self._thread = None
+        self._running = False
+
+    def start(self, handler):
+        self._running = True
+        self._thread = threading.Thread(target=self.run, args=(handler,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+
+    def run(self, handler):
+        """Replay synchronously in the calling thread."""
+        self._running = True
+        perf_counter_ns = time.perf_counter_ns
+        results = self.results
+        start = time.monotonic()
+        first = self.events[0][2] if self.events else 0.0
+        for vk, is_down, timestamp in self.events:
+            if not self._running:
+                break
+            if self.realtime:
+                delay = (timestamp - first) - (time.monotonic() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            self._track(vk, is_down)
+            t0 = perf_counter_ns()
+            suppressed = bool(handler(vk, is_down, timestamp, False))
+            results.append((vk, is_down, suppressed, perf_counter_ns() - t0))
+        self.done.set()
+        return results
+
+
+def create_source(spec):
+    """Build a source from 'win32', 'evdev[:device]' or 'replay:path'."""
+    name, _, arg = spec.partition(':')
+    if name == 'win32':
+        return Win32Source()
+    if name == 'evdev':
+        return EvdevSource(arg or None)
+    if name == 'replay':
+        return ReplaySource(arg, realtime=True)
+    raise ValueError(f"Unknown event source: {spec}")
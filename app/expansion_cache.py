@@ -0,0 +1,142 @@
+"""Persistent LRU cache of AI expansions.
+
+Entries are keyed by everything that shapes the completion: the normalized
+tokens, output language, model, temperature, prompt hints and the
+conversation context sent with them. The cache lives in memory (an
+OrderedDict in LRU order), so a hit is a dict lookup; it is backed by a
+SQLite database in WAL mode so it survives restarts. Least recently used
+entries are evicted past max_entries.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import log
+
+
+def cache_key(tokens, language, model, temperature, context=(), hints=''):
+    """Stable key for one expansion request."""
+    data = json.dumps([' '.join(tokens.split()), language, model, temperature,
+                       [list(turn) for turn in context], hints],
+                      ensure_ascii=False, separators=(',', ':'))
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class ExpansionCache:
+    """key -> expansion LRU with an optional SQLite store at path."""
+
+    def __init__(self, path=None, max_entries=2000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> result, least recent first
+        self._clock = 0    # LRU clock persisted as each row's last use
+        self._touched = {}  # key -> clock of hits not yet written
+        self._db = None
+        self._lock = threading.Lock()
+
+    def open(self):
+        """Load entries from path (an unreadable database runs memory-only)."""
+        if not self.path:
+            return
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            db.execute('CREATE TABLE IF NOT EXISTS expansions ('
+                       'key TEXT PRIMARY KEY, result TEXT NOT NULL, used INTEGER NOT NULL)')
+            rows = db.execute('SELECT key, result, used FROM expansions '
+                              'ORDER BY used DESC LIMIT ?', (self.max_entries,)).fetchall()
+        except (OSError, sqlite3.Error) as e:
+            log.warning("Expansion cache %s unavailable, keeping it in memory: %s", self.path, e)
+            return
+        with self._lock:
+            self._db = db
+            for key, result, used in reversed(rows):
+                self._entries[key] = result
+                self._clock = max(self._clock, used)
+
+    def get(self, key):
+        """Cached expansion for key, or None. Counts a hit or a miss."""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            self._clock += 1
+            self._touched[key] = self._clock
+            return result
+
+    def __contains__(self, key):
+        """Membership without counting a lookup or refreshing recency."""
+        return key in self._entries
+
+    def put(self, key, result):
+        """Store an expansion, evicting the least recently used past the limit."""
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            self._clock += 1
+            self._touched.pop(key, None)
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                old, _ = self._entries.popitem(last=False)
+                self._touched.pop(old, None)
+                evicted.append((old,))
+            if self._db is None:
+                return
+            try:
+                with self._db:
+                    self._db.execute('INSERT OR REPLACE INTO expansions VALUES (?, ?, ?)',
+                                     (key, result, self._clock))
+                    self._db.executemany('DELETE FROM expansions WHERE key = ?', evicted)
+                    self._write_touched()
+            except sqlite3.Error:
+                pass  # Still cached in memory
+
+    def _write_touched(self):
+        if self._touched:
+            self._db.executemany('UPDATE expansions SET used = ? WHERE key = ?',
+                                 [(used, key) for key, used in self._touched.items()])
+            self._touched.clear()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._touched.clear()
+            if self._db is None:
+                return
+            try:
+                with self._db:
+                    self._db.execute('DELETE FROM expansions')
+            except sqlite3.Error:
+                pass  # Cleared in memory; stale rows reload next start
+
+    def stats(self):
+        """Hit/miss counters and size."""
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries),
+                'hit_rate': self.hits / lookups if lookups else 0.0}
+
+    def close(self):
+        """Write pending recency updates and close the database."""
+        with self._lock:
+            if self._db is None:
+                return
+            try:
+                with self._db:
+                    self._write_touched()
+            except sqlite3.Error:
+                pass
+            self._db.close()
+            self._db = None
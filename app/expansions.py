@@ -0,0 +1,93 @@
+"""Expansions in flight and their text on screen.
+
+Each sent buffer becomes a request {'seq', 'tokens', 'shown' (its text on
+screen), 'streamed' (expansion text received so far)}, oldest first. Their
+text is followed on screen by the live buffer (unless ghost), so changing
+one retypes everything after it up to the cursor. All methods but add()
+run on the hook's output worker, in order with typed tokens.
+"""
+
+from collections import deque
+
+import log
+from keyboard_hook import KeyboardHook
+
+
+class PendingExpansions:
+    """Screen bookkeeping for in-flight expansions.
+
+    on_delivered(request, text, error) is called once per request when it
+    leaves the queue; error is the AI error or, if the result couldn't be
+    typed, the injection failure.
+    """
+
+    def __init__(self, engine, hook, ghost=False, on_delivered=None):
+        self.engine = engine
+        self.hook = hook
+        self.ghost = ghost
+        self.on_delivered = on_delivered
+        self.requests = deque()
+
+    def __len__(self):
+        return len(self.requests)
+
+    def add(self, tokens):
+        """Track a sent buffer; the typed tokens move from the live buffer
+        to the request. Set its 'seq' once the AI engine returns it."""
+        request = {'seq': None, 'tokens': tokens,
+                   'shown': '' if self.ghost else tokens, 'streamed': ''}
+        self.requests.append(request)
+        self.hook.in_flight = len(self.requests)
+        return request
+
+    def screen_tail(self):
+        """On-screen text from the oldest in-flight expansion to the cursor."""
+        text = ''.join(request['shown'] for request in self.requests)
+        return text if self.ghost else text + self.engine.buffer_text()
+
+    def show(self, request, text):
+        """Put text on screen in place of request's."""
+        old = self.screen_tail()
+        previous, request['shown'] = request['shown'], text
+        # Only the part after the common prefix is retyped
+        try:
+            KeyboardHook.edit_text(old, self.screen_tail())
+        except Exception:
+            request['shown'] = previous
+            raise
+
+    def show_chunk(self, text, seq):
+        if not self.requests or self.requests[0]['seq'] != seq:
+            return
+        # The first piece replaces the typed tokens, later ones are appended.
+        # Pieces are only shown while nothing follows the expansion on
+        # screen; otherwise deliver() puts the whole result in place once.
+        request = self.requests[0]
+        request['streamed'] += text
+        if self.screen_tail() == request['shown']:
+            self.show(request, request['streamed'])
+
+    def deliver(self, text, seq, error=None):
+        """Put request seq's final text on screen and retire it. On error
+        text is the raw tokens, which go back in place of whatever is on
+        screen (partial streamed output; nothing in ghost mode)."""
+        if not self.requests or self.requests[0]['seq'] != seq:
+            return
+        request = self.requests[0]
+        try:
+            self.show(request, text)
+        except Exception as e:
+            log.exception("Couldn't type expansion: %s", e)
+            if error is None:
+                error = f"couldn't type the result ({e})"
+        finally:
+            # Retired even if typing failed, so later results and the held
+            # cursor keys aren't stuck behind it
+            self.requests.popleft()
+            self.hook.in_flight = len(self.requests)
+            try:
+                if self.on_delivered is not None:
+                    self.on_delivered(request, text, error)
+            finally:
+                if not self.requests:
+                    self.hook.settle()
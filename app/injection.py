@@ -0,0 +1,343 @@
+"""Keystroke injection backends.
+
+Output is submitted as whole edits: submit(deletions, text) removes
+`deletions` characters before the cursor with backspaces and then types
+`text`, as one batch. Batches are serialized, so concurrent senders (the
+output worker, the AI thread) never interleave.
+
+Backends:
+  SendInputInjector  one Win32 SendInput call per batch (or per chunk of
+                     chunk_size events, with `pacing` seconds between)
+  PynputInjector     pynput Controller, one key at a time with `pacing`
+                     seconds between taps (portable fallback)
+  RecordingInjector  fake sink that records batches and applies them to an
+                     in-memory text, for tests and benchmarks
+  PasteInjector      wraps one of the above; text of threshold characters or
+                     more is pasted through the clipboard with one Ctrl+V
+"""
+
+import ctypes
+import threading
+import time
+
+# Keys for tap()
+TAP_VKS = {
+    'backspace': 0x08, 'enter': 0x0D,
+    'left': 0x25, 'up': 0x26, 'right': 0x27, 'down': 0x28,
+}
+
+
+def minimal_edit(old, new):
+    """(deletions, text) turning on-screen old into new.
+
+    Edits can only delete backwards from the cursor, so the minimal script
+    keeps the common prefix and replaces the rest.
+    """
+    keep = 0
+    limit = min(len(old), len(new))
+    while keep < limit and old[keep] == new[keep]:
+        keep += 1
+    return len(old) - keep, new[keep:]
+
+
+class Injector:
+    """Base class; subclasses implement the _-prefixed methods."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def submit(self, deletions=0, text=''):
+        """Send `deletions` backspaces followed by text, as one batch."""
+        if deletions or text:
+            with self._lock:
+                self._submit(deletions, text)
+
+    def tap(self, key):
+        """Press and release one key: a TAP_VKS name or a virtual-key code."""
+        with self._lock:
+            self._tap(key)
+
+    def ctrl_backspace(self):
+        """Ctrl+Backspace (delete the previous word)."""
+        with self._lock:
+            self._ctrl_backspace()
+
+    def paste(self):
+        """Ctrl+V."""
+        with self._lock:
+            self._paste()
+
+    def _submit(self, deletions, text):
+        raise NotImplementedError
+
+    def _tap(self, key):
+        raise NotImplementedError
+
+    def _ctrl_backspace(self):
+        raise NotImplementedError
+
+    def _paste(self):
+        raise NotImplementedError
+
+
+# =============================================================================
+# WIN32 SendInput
+# =============================================================================
+# The INPUT structures are plain ctypes, so encoding works (and can be
+# benchmarked) on any platform; only submission needs user32.
+
+INPUT_KEYBOARD = 1
+KEYEVENTF_EXTENDEDKEY = 0x1
+KEYEVENTF_KEYUP = 0x2
+KEYEVENTF_UNICODE = 0x4
+VK_CONTROL = 0x11
+VK_V = 0x56
+# Arrows, Page Up/Down, End, Home, Insert, Delete
+_EXTENDED_VKS = {0x21, 0x22, 0x23, 0x24, 0x25, 0x26, 0x27, 0x28, 0x2D, 0x2E}
+
+
+class _MOUSEINPUT(ctypes.Structure):
+    _fields_ = [('dx', ctypes.c_int32), ('dy', ctypes.c_int32),
+                ('mouseData', ctypes.c_uint32), ('dwFlags', ctypes.c_uint32),
+                ('time', ctypes.c_uint32), ('dwExtraInfo', ctypes.c_size_t)]
+
+
+class _KEYBDINPUT(ctypes.Structure):
+    _fields_ = [('wVk', ctypes.c_uint16), ('wScan', ctypes.c_uint16),
+                ('dwFlags', ctypes.c_uint32), ('time', ctypes.c_uint32),
+                ('dwExtraInfo', ctypes.c_size_t)]
+
+
+class _INPUTUNION(ctypes.Union):
+    # mi is the largest member and sets the union size SendInput expects
+    _fields_ = [('mi', _MOUSEINPUT), ('ki', _KEYBDINPUT)]
+
+
+class INPUT(ctypes.Structure):
+    _fields_ = [('type', ctypes.c_uint32), ('u', _INPUTUNION)]
+
+
+def _vk_events(vk, flags=0):
+    """(vk, scan, flags) down/up pair for a virtual key."""
+    if vk in _EXTENDED_VKS:
+        flags |= KEYEVENTF_EXTENDEDKEY
+    return [(vk, 0, flags), (vk, 0, flags | KEYEVENTF_KEYUP)]
+
+
+def encode_edit(deletions, text):
+    """(vk, scan, flags) key events for an edit.
+
+    Text is sent as UTF-16 code units with KEYEVENTF_UNICODE, so it types
+    the same under any keyboard layout; newlines use VK_RETURN.
+    """
+    events = _vk_events(0x08) * deletions
+    for char in text:
+        if char == '\n':
+            events.extend(_vk_events(0x0D))
+            continue
+        data = char.encode('utf-16-le')
+        for i in range(0, len(data), 2):
+            unit = data[i] | data[i + 1] << 8
+            events.append((0, unit, KEYEVENTF_UNICODE))
+            events.append((0, unit, KEYEVENTF_UNICODE | KEYEVENTF_KEYUP))
+    return events
+
+
+def build_inputs(events):
+    """INPUT array for (vk, scan, flags) events."""
+    inputs = (INPUT * len(events))()
+    for inp, (vk, scan, flags) in zip(inputs, events):
+        inp.type = INPUT_KEYBOARD
+        ki = inp.u.ki
+        ki.wVk = vk
+        ki.wScan = scan
+        ki.dwFlags = flags
+    return inputs
+
+
+class SendInputInjector(Injector):
+    """Batched SendInput. chunk_size=None sends each edit in one call."""
+
+    def __init__(self, chunk_size=None, pacing=0.0):
+        super().__init__()
+        self.chunk_size = chunk_size
+        self.pacing = pacing
+        user32 = ctypes.windll.user32
+        self._send = user32.SendInput
+        self._send.argtypes = [ctypes.c_uint, ctypes.POINTER(INPUT), ctypes.c_int]
+        self._send.restype = ctypes.c_uint
+
+    def _send_events(self, events):
+        step = self.chunk_size or len(events)
+        for start in range(0, len(events), step):
+            if start and self.pacing:
+                time.sleep(self.pacing)
+            chunk = events[start:start + step]
+            sent = self._send(len(chunk), build_inputs(chunk), ctypes.sizeof(INPUT))
+            if sent != len(chunk):
+                # Blocked by UIPI (elevated target window) or desktop switch
+                raise OSError(f"SendInput injected {sent}/{len(chunk)} events")
+
+    def _submit(self, deletions, text):
+        self._send_events(encode_edit(deletions, text))
+
+    def _tap(self, key):
+        self._send_events(_vk_events(TAP_VKS.get(key, key)))
+
+    def _ctrl_backspace(self):
+        self._send_events([(VK_CONTROL, 0, 0)] + _vk_events(0x08)
+                          + [(VK_CONTROL, 0, KEYEVENTF_KEYUP)])
+
+    def _paste(self):
+        self._send_events([(VK_CONTROL, 0, 0)] + _vk_events(VK_V)
+                          + [(VK_CONTROL, 0, KEYEVENTF_KEYUP)])
+
+
+# =============================================================================
+# PYNPUT
+# =============================================================================
+
+class PynputInjector(Injector):
+    """Per-key pynput injection, sleeping `pacing` seconds between keys."""
+
+    def __init__(self, pacing=0.01):
+        super().__init__()
+        from pynput.keyboard import Controller, Key, KeyCode
+        self.pacing = pacing
+        self._controller = Controller()
+        self._key_code = KeyCode.from_vk
+        self._keys = {name: getattr(Key, name) for name in TAP_VKS}
+        self._ctrl = Key.ctrl
+
+    def _submit(self, deletions, text):
+        backspace = self._keys['backspace']
+        for _ in range(deletions):
+            self._controller.tap(backspace)
+            if self.pacing:
+                time.sleep(self.pacing)
+        if text:
+            self._controller.type(text)
+
+    def _tap(self, key):
+        self._controller.tap(self._keys[key] if key in self._keys else self._key_code(key))
+
+    def _ctrl_backspace(self):
+        with self._controller.pressed(self._ctrl):
+            self._controller.tap(self._keys['backspace'])
+
+    def _paste(self):
+        with self._controller.pressed(self._ctrl):
+            self._controller.tap('v')
+
+
+# =============================================================================
+# RECORDING (fake sink)
+# =============================================================================
+
+class RecordingInjector(Injector):
+    """Records every batch and applies it to `text` instead of the OS.
+
+    batches holds ('edit', deletions, text), ('tap', key),
+    ('ctrl_backspace',) and ('paste', text) entries; keystrokes counts the
+    keys a real backend would press. Pastes read `clipboard` (e.g. a
+    clipboard.MemoryClipboard).
+    """
+
+    def __init__(self, clipboard=None):
+        super().__init__()
+        self.clipboard = clipboard
+        self.batches = []
+        self.text = ''
+        self.keystrokes = 0
+
+    def _submit(self, deletions, text):
+        self.batches.append(('edit', deletions, text))
+        if deletions:
+            self.text = self.text[:-deletions]
+        self.text += text
+        self.keystrokes += deletions + len(text)
+
+    def _tap(self, key):
+        self.batches.append(('tap', key))
+        if key == 'backspace':
+            self.text = self.text[:-1]
+        elif key == 'enter':
+            self.text += '\n'
+        self.keystrokes += 1
+
+    def _ctrl_backspace(self):
+        self.batches.append(('ctrl_backspace',))
+        self.text = self.text.rstrip()
+        self.text = self.text[:len(self.text) - len(self.text.split(' ')[-1])]
+        self.keystrokes += 2
+
+    def _paste(self):
+        text = self.clipboard.get() if self.clipboard else None
+        self.batches.append(('paste', text))
+        self.text += text or ''
+        self.keystrokes += 2
+
+
+# =============================================================================
+# CLIPBOARD PASTE
+# =============================================================================
+
+class PasteInjector(Injector):
+    """Pastes long text through the clipboard instead of typing it.
+
+    Text of `threshold` characters or more is put on the clipboard and
+    pasted with one Ctrl+V; the previous clipboard text is restored after
+    `restore_delay` seconds, giving the target application time to read the
+    paste first. Everything else goes to the wrapped injector, as does long
+    text while the clipboard holds anything but text (which couldn't be
+    restored) or can't be set.
+    """
+
+    def __init__(self, inner, clipboard, threshold=64, restore_delay=0.1):
+        super().__init__()
+        self.inner = inner
+        self.clipboard = clipboard
+        self.threshold = threshold
+        self.restore_delay = restore_delay
+
+    def _submit(self, deletions, text):
+        if len(text) < self.threshold or not self._paste_text(deletions, text):
+            self.inner.submit(deletions, text)
+
+    def _paste_text(self, deletions, text):
+        """Paste text in place of deletions characters; False (with nothing
+        injected) if the clipboard can't be borrowed."""
+        try:
+            if not self.clipboard.text_only():
+                return False
+            saved = self.clipboard.get()
+            self.clipboard.set(text)
+        except OSError:
+            return False
+        try:
+            self.inner.submit(deletions, '')
+            self.inner.paste()
+            time.sleep(self.restore_delay)
+        finally:
+            self.clipboard.set(saved)
+        return True
+
+    def _tap(self, key):
+        self.inner.tap(key)
+
+    def _ctrl_backspace(self):
+        self.inner.ctrl_backspace()
+
+    def _paste(self):
+        self.inner.paste()
+
+
+def create_injector(spec, pacing=None, chunk_size=None):
+    """Build an injector from 'sendinput', 'pynput' or 'recording'."""
+    if spec == 'sendinput':
+        return SendInputInjector(chunk_size, pacing or 0.0)
+    if spec == 'pynput':
+        return PynputInjector(0.01 if pacing is None else pacing)
+    if spec == 'recording':
+        return RecordingInjector()
+    raise ValueError(f"Unknown injector: {spec}")
@@ -1,33 +1,110 @@
-"""Global keyboard hook: pynput listener with win32_event_filter suppression.
+"""Global keyboard hook: chord processing over a pluggable event source.
 
-ALL chord processing happens inside _win32_filter. pynput's suppress_event()
-raises SuppressException which we must let propagate to actually suppress keys.
+ALL chord processing happens inside _process_event, called by the event
+source (see event_sources.py) for every key press/release. It returns True
+to suppress the key; the source does the platform-specific suppression.
+
+The hook thread only classifies events and runs the chord engine. Chord
+results, UI notifications and callbacks go onto a bounded queue drained by
+the output worker thread, which does all injection and logging. The worker
+also wakes up for the engine's auto-repeats (held arrow/backspace chords).
+
+In ghost-buffer mode (ghost=True) tokens and text-mode characters are not
+typed as they are entered; they only accumulate in the engine buffer, shown
+by the overlay, and reach the application once, as the final expansion.
 """
 
-import ctypes
-import sys
+import queue
+import threading
 import time
-import traceback
-
-from pynput import keyboard
-from pynput.keyboard import Controller, Key
-from pynput._util.win32 import SystemHook
 
+import log
 from config import (
-    VK_TO_KEY, VK_SPACE, VK_Q_TOGGLE, VK_BACKSPACE,
-    LLKHF_INJECTED, MODIFIER_VKS, PASSTHROUGH_VKS,
+    VK_SPACE, VK_Q_TOGGLE, VK_BACKSPACE,
+    MODIFIER_VKS, PASSTHROUGH_VKS,
+    get_injector, get_inject_pacing, get_inject_chunk,
+    get_paste_threshold, get_clipboard,
+)
+from clipboard import create_clipboard
+from event_sources import Win32Source
+from injection import PasteInjector, create_injector, minimal_edit
+from keymap import US_KEYMAP
+from overlay import (
+    notify_held_keys, notify_sequences, notify_context, notify_suggestions,
+    notify_buffer,
 )
-from overlay import notify_held_keys
 from search_popup import is_search_open, request_search_close
 from language_popup import is_popup_open as is_language_popup_open
 
 VK_ESCAPE = 0x1B
 
-user32 = ctypes.windll.user32
-user32.GetAsyncKeyState.argtypes = [ctypes.c_int]
-user32.GetAsyncKeyState.restype = ctypes.c_short
-
-controller = Controller()
+# Modifier state is tracked from the event stream as a bitmask, one bit per
+# modifier VK (generic and side-specific codes)
+MODIFIER_BITS = {vk: 1 << i for i, vk in enumerate((
+    0x10, 0xA0, 0xA1,  # Shift, LShift, RShift
+    0x11, 0xA2, 0xA3,  # Ctrl, LCtrl, RCtrl
+    0x12, 0xA4, 0xA5,  # Alt, LMenu, RMenu
+    0x5B, 0x5C,        # LWin, RWin
+))}
+SHIFT_MASK = 0b111
+CTRL_MASK = 0b111 << 3
+ALT_MASK = 0b111 << 6
+WIN_MASK = 0b11 << 9
+SIDED_MODIFIER_VKS = (0xA0, 0xA1, 0xA2, 0xA3, 0xA4, 0xA5, 0x5B, 0x5C)
+
+# Seconds between modifier resyncs from source.key_state (covers missed
+# events, e.g. a modifier released while another hook swallowed it); the
+# keyboard layout is re-read on the same schedule
+MODIFIER_RESYNC_INTERVAL = 1.0
+
+# Injection backend for all output (see injection.py); created on first use
+_injector = None
+
+
+def set_injector(injector):
+    """Replace the injection backend (e.g. with a RecordingInjector)."""
+    global _injector
+    _injector = injector
+
+
+def _get_injector():
+    global _injector
+    if _injector is None:
+        _injector = create_injector(get_injector(), get_inject_pacing(), get_inject_chunk())
+        threshold = get_paste_threshold()
+        if threshold is not None:
+            if get_clipboard():
+                _injector = PasteInjector(_injector, create_clipboard(get_clipboard()), threshold)
+            else:
+                log.warning("Paste mode needs CHORD_CLIPBOARD on this platform; typing instead")
+    return _injector
+
+# Output queue capacity. Past it, overlay updates ('keys') are dropped (and
+# counted); any other item waits up to POST_BLOCK_TIMEOUT seconds for the
+# worker to catch up and is then queued anyway, since losing a token or an
+# edit would leave the buffer out of step with the screen.
+ACTION_QUEUE_SIZE = 256
+POST_BLOCK_TIMEOUT = 0.05
+
+# Results whose handlers read or edit the engine's buffers or mode. While one
+# is queued, new chord keys are run by the output worker after it, so buffer
+# edits happen in keystroke order.
+ENGINE_ACTIONS = frozenset({'send_ai', 'backspace', 'toggle_mode', 'type_chars'})
+
+# Results that move the cursor away from the end of the typed text. Text of
+# in-flight expansions is edited from the cursor, so while any are in flight
+# these are held (and chord input paused) until all have been delivered.
+CURSOR_ACTIONS = frozenset({'enter', 'arrow'})
+
+# Text-mode keys that move the cursor, as the chord results they replay as
+TEXT_CURSOR_KEYS = {
+    0x0D: ('enter',),
+    0x25: ('arrow', 'left'), 0x26: ('arrow', 'up'),
+    0x27: ('arrow', 'right'), 0x28: ('arrow', 'down'),
+}
+
+# Hook callback latency histogram: bucket b counts calls of [2^(b-1), 2^b) ns
+LATENCY_BUCKETS = 40
 
 
 class KeyboardHook:
@@ -36,7 +113,7 @@ class KeyboardHook:
     def __init__(self, chord_engine, on_toggle, on_send_ai, on_token,
                  on_backspace, on_mode_toggle, on_cheatsheet, on_enter,
                  on_search, on_mode_change=None, on_clear_context=None,
-                 on_language=None):
+                 on_language=None, source=None, ghost=False):
         self.engine = chord_engine
         self.on_toggle = on_toggle
         self.on_send_ai = on_send_ai
@@ -50,21 +127,165 @@ class KeyboardHook:
         self.on_clear_context = on_clear_context  # Clear AI context
         self.on_language = on_language  # Language selector popup
         self.enabled = False
-        self.converting = False
-        self._listener = None
+        self.converting = False  # Chord input paused (held cursor actions)
+        self.in_flight = 0       # Expansions not delivered yet (set by the app)
+        self._held = []          # Chord results waiting for in_flight to drain
+        self.source = source  # EventSource; Win32Source if None
+        self.ghost = ghost    # Keep the buffer off-screen until expanded
+        self.modifiers = 0      # MODIFIER_BITS of modifiers held
+        self._modifiers_synced = None  # Event timestamp of the last resync
+        self.keymap = US_KEYMAP  # Key tables for the active layout
+        self.hook_latency = [0] * LATENCY_BUCKETS
+        self.dropped = 0  # Overlay updates lost to a full queue
+        self._actions = queue.Queue()  # Bounded by _post (ACTION_QUEUE_SIZE)
+        self._edits_posted = 0  # ENGINE_ACTIONS/deferred keys/edits queued
+        self._edits_done = 0    # ... and handled (output worker)
+        # Serializes engine key handling (hook thread) with auto-repeat polls
+        # (output worker), and guards _edits_posted, which both update
+        self._engine_lock = threading.Lock()
+        self._clock_offset = 0.0  # Event timestamp minus time.monotonic()
+        self._worker = threading.Thread(target=self._output_loop, daemon=True)
 
     def start(self):
-        self._listener = keyboard.Listener(
-            on_press=self._noop,
-            on_release=self._noop,
-            win32_event_filter=self._win32_filter,
-        )
-        self._listener.start()
-        print("  Keyboard hook started", flush=True)
+        if self.source is None:
+            self.source = Win32Source()
+        self.keymap = self.source.keymap()
+        self._worker.start()
+        self.source.start(self._on_event)
+        log.info("  Keyboard hook started (%s)", type(self.source).__name__)
 
     def stop(self):
-        if self._listener:
-            self._listener.stop()
+        if self.source:
+            self.source.stop()
+        self._actions.put(None)
+
+    def latency_report(self):
+        """Hook callback latency histogram as printable lines."""
+        total = sum(self.hook_latency)
+        lines = [f"Hook callback latency ({total} events, {self.dropped} dropped overlay updates):"]
+        for b, count in enumerate(self.hook_latency):
+            if count:
+                lines.append(f"  < {_format_ns(1 << b):>7}: {count:8d} "
+                             f"({100 * count / total:5.1f}%)")
+        return lines
+
+    # ==================== OUTPUT WORKER ====================
+
+    def _post(self, item):
+        """Queue an item for the output worker (see ACTION_QUEUE_SIZE)."""
+        actions = self._actions
+        if actions.qsize() >= ACTION_QUEUE_SIZE:
+            if item[0] == 'keys':
+                self.dropped += 1
+                return
+            deadline = time.monotonic() + POST_BLOCK_TIMEOUT
+            while actions.qsize() >= ACTION_QUEUE_SIZE and time.monotonic() < deadline:
+                time.sleep(0.001)
+        actions.put(item)
+
+    def _post_edit(self, item):
+        """Queue an item the worker counts in _edits_done once handled."""
+        self._edits_posted += 1
+        self._post(item)
+
+    def run_edit(self, fn, *args):
+        """Run fn(*args) on the output worker (from any thread). Chord keys
+        pressed after this are handled after it, so fn sees the engine's
+        buffers as they are on screen."""
+        with self._engine_lock:
+            self._post_edit(('edit', fn, args))
+
+    def hold(self, result):
+        """Pause chord input and run result once settle() is called (output
+        worker)."""
+        self._held.append(result)
+        self.converting = True
+
+    def settle(self):
+        """All expansions delivered (output worker): run held results and
+        resume chord input."""
+        held, self._held = self._held, []
+        self.converting = False
+        for result in held:
+            if result[0] == 'text':
+                self._replay_text_key(result[1], result[2])
+            else:
+                self._handle_chord_result(result)
+
+    def _output_loop(self):
+        while True:
+            try:
+                item = self._actions.get(timeout=self._repeat_wait())
+            except queue.Empty:
+                self._run_repeats()
+                continue
+            if item is None:
+                return
+            kind = item[0]
+            try:
+                if kind == 'keys':
+                    notify_held_keys(item[1])
+                elif kind == 'chord':
+                    self._output_result(item[1], item[2])
+                elif kind == 'key':
+                    # Deferred chord key: run the engine here, after the
+                    # queued edits, and handle its result inline
+                    if not self.converting:
+                        with self._engine_lock:
+                            result = self._chord_key(item[1], item[2], item[3])
+                        notify_held_keys(self.engine.held_keys)
+                        if result is not None:
+                            self._output_result(result, len(self.engine.token_buffer) > 1)
+                elif kind == 'text':
+                    self._replay_text_key(item[1], item[2])
+                elif kind == 'call' or kind == 'edit':
+                    item[1](*item[2])
+            except Exception as e:
+                log.exception("Output worker error: %s", e)
+            if kind in ('key', 'text', 'edit') or kind == 'chord' and item[1][0] in ENGINE_ACTIONS:
+                self._edits_done += 1
+            self._run_repeats()
+
+    def _repeat_wait(self):
+        """Seconds until the engine's next auto-repeat, or None to block."""
+        due = self.engine.repeat_due
+        if due is None:
+            return None
+        return max(0.0, due - (time.monotonic() + self._clock_offset))
+
+    def _run_repeats(self):
+        """Tap the keys of the auto-repeats due now. Repeats only inject the
+        key; they don't run the chord's engine action again."""
+        now = time.monotonic() + self._clock_offset
+        while True:
+            with self._engine_lock:
+                result = self.engine.poll_repeat(now)
+            if result is None:
+                return
+            if self.converting or self.in_flight:
+                continue  # Cursor must stay put: drop the repeat
+            key = result[1]
+            if key == 'backspace':
+                self.send_backspace(1)
+            else:
+                self._send_arrow(key)
+
+    def _output_result(self, result, spaced):
+        notify_sequences(self.engine.pending_sequences(), self.engine.sequence_timeout)
+        self._handle_chord_result(result, spaced)
+        notify_context(tuple(self.engine.token_buffer[-2:]))
+        if self.ghost:
+            self._show_buffer()
+
+    def _show_buffer(self):
+        notify_buffer(self.engine.get_buffer_display())
+
+    def _chord_key(self, key, is_down, timestamp):
+        """Feed a chord key to the engine. Returns the chord result or None."""
+        if is_down:
+            self.engine.key_down(key, timestamp)
+            return None
+        return self.engine.key_up(key, timestamp)
 
     def toggle(self):
         # If in text mode, switch to semantic instead of disabling
@@ -77,101 +298,100 @@ class KeyboardHook:
             self.engine.mode = 'semantic'
             # Update display without toggling engine again
             if self.on_mode_change:
-                self.on_mode_change('semantic')
+                self._post(('call', self.on_mode_change, ('semantic',)))
             return
         # Otherwise toggle enabled/disabled
         self.enabled = not self.enabled
         if not self.enabled:
+            if self.ghost:
+                # Nothing pending is on screen yet: type it raw, not lose it
+                text, _ = self.engine.flush_buffer()
+                if text:
+                    self._post(('call', self.type_text, (text,)))
+                self._post(('call', notify_buffer, ('',)))
             self.engine.reset()
             self.converting = False
-            notify_held_keys(set())  # Hide overlay
+            self._held = []
+            self._post(('keys', frozenset()))  # Hide overlay
 
-    @staticmethod
-    def _noop(key):
-        pass
-
-    def _vk_to_char(self, vk):
-        """Convert VK code to character for text mode tracking."""
-        # Letters A-Z (0x41-0x5A)
-        if 0x41 <= vk <= 0x5A:
-            shift = user32.GetAsyncKeyState(0x10) & 0x8000
-            char = chr(vk)
-            return char if shift else char.lower()
-        # Numbers 0-9 (0x30-0x39)
-        if 0x30 <= vk <= 0x39:
-            return chr(vk)
-        # Common punctuation
-        VK_CHARS = {
-            0xBA: ';', 0xBB: '=', 0xBC: ',', 0xBD: '-',
-            0xBE: '.', 0xBF: '/', 0xC0: '`', 0xDB: '[',
-            0xDC: '\\', 0xDD: ']', 0xDE: "'",
-        }
-        return VK_CHARS.get(vk)
-
-    def _win32_filter(self, msg, data):
+    def _on_event(self, vk, is_down, timestamp, injected):
+        """Event source handler. Returns True to suppress the key."""
+        t0 = time.perf_counter_ns()
+        self._clock_offset = timestamp - time.monotonic()
         try:
-            result = self._process_event(msg, data)
-            return result
-        except SystemHook.SuppressException:
-            raise
+            return self._process_event(vk, is_down, timestamp, injected)
         except Exception as e:
-            print(f"Event processing error: {e}", flush=True)
-            traceback.print_exc()
-            sys.stdout.flush()
-
-    def _process_event(self, msg, data):
-        is_down = msg in (0x100, 0x104)
-        is_up = msg in (0x101, 0x105)
-        if not (is_down or is_up):
-            return
-
-        vk = data.vkCode
-        flags = data.flags
-
-        # Debug: uncomment to see all key events
-        # print(f"Key event: vk={vk}, down={is_down}, enabled={self.enabled}", flush=True)
+            log.exception("Event processing error: %s", e)
+            return False
+        finally:
+            elapsed = time.perf_counter_ns() - t0
+            self.hook_latency[min(elapsed.bit_length(), LATENCY_BUCKETS - 1)] += 1
+
+    def _resync_modifiers(self, timestamp):
+        """Rebuild the modifier mask from the source's key state, and have
+        the output worker check for keyboard layout switches.
+
+        Only side-specific codes are queried: a generic code reads as down
+        while either side is, but its bit would then never see a release.
+        """
+        key_state = self.source.key_state
+        self.modifiers = sum(MODIFIER_BITS[vk] for vk in SIDED_MODIFIER_VKS if key_state(vk))
+        self._modifiers_synced = timestamp
+        self._post(('call', self._refresh_keymap, ()))
+
+    def _refresh_keymap(self):
+        """Query the active layout and compile its tables if new (output
+        worker, off the hook callback); swapped in with one assignment."""
+        self.keymap = self.source.keymap()
+
+    def _process_event(self, vk, is_down, timestamp, injected):
+        is_up = not is_down
+
+        log.debug("Key event: vk=%#x, down=%s, enabled=%s", vk, is_down, self.enabled)
+
+        # Track modifiers (including injected ones, like the OS key state)
+        bit = MODIFIER_BITS.get(vk)
+        if bit is not None:
+            if is_down:
+                self.modifiers |= bit
+            else:
+                self.modifiers &= ~bit
+        elif (self._modifiers_synced is None
+                or not 0 <= timestamp - self._modifiers_synced <= MODIFIER_RESYNC_INTERVAL):
+            self._resync_modifiers(timestamp)
 
         # Never suppress our own injected keystrokes
-        if flags & LLKHF_INJECTED:
-            return
+        if injected:
+            return False
 
         # --- Toggle hotkey: Alt+Q ---
         if vk == VK_Q_TOGGLE and is_down:
-            alt = user32.GetAsyncKeyState(0x12) & 0x8000
-            if alt:
-                print(f"Alt+Q pressed, enabled={self.enabled}", flush=True)
-                try:
-                    self.toggle()
-                    self.on_toggle()
-                    print(f"Alt+Q handled, enabled={self.enabled}", flush=True)
-                except Exception as e:
-                    print(f"Toggle error: {e}", flush=True)
-                    traceback.print_exc()
-                    sys.stdout.flush()
-                self._listener.suppress_event()
-                return
+            if self.modifiers & ALT_MASK:
+                self.toggle()
+                self._post(('call', self.on_toggle, ()))
+                return True
 
         # Engine OFF → pass everything through
         if not self.enabled:
-            return
+            return False
 
         # Always pass through modifier keys
         if vk in MODIFIER_VKS:
-            return
+            return False
 
         # Always pass through system/function keys
         if vk in PASSTHROUGH_VKS:
             # Special case: Escape closes search popup if open
             if vk == VK_ESCAPE and is_down and is_search_open():
-                request_search_close()
-            return
+                self._post(('call', request_search_close, ()))
+            return False
 
         # When search or language popup is open, pass through ALL keys for typing
         # Only intercept complete multi-key chords (C+M, C+J, C+L)
         if is_search_open() or is_language_popup_open():
-            key_name = VK_TO_KEY.get(vk)
+            key_name = self.keymap.chord_keys[vk]
             if key_name is None:
-                return  # Not a chord key, pass through
+                return False  # Not a chord key, pass through
 
             # Track held keys for popup chord detection (separate from engine)
             if not hasattr(self, '_popup_held'):
@@ -188,84 +408,142 @@ class KeyboardHook:
                 if len(held) == 2 and 'c' in held:
                     other_key = (held - {'c'}).pop()
                     if other_key == 'm':
-                        self._handle_chord_result(('enter',))
-                        return
+                        self._post(('chord', ('enter',), False))
                     elif other_key == 'j':
-                        self._handle_chord_result(('search',))
-                        return
+                        self._post(('chord', ('search',), False))
                     elif other_key == 'l':
-                        self._handle_chord_result(('language',))
-                        return
+                        self._post(('chord', ('language',), False))
 
-            return  # Let all keys pass through for typing
+            return False  # Let all keys pass through for typing
 
         # Pass through any key pressed with Ctrl/Alt/Win (system shortcuts)
-        ctrl = user32.GetAsyncKeyState(0x11) & 0x8000
-        alt = user32.GetAsyncKeyState(0x12) & 0x8000
-        lwin = user32.GetAsyncKeyState(0x5B) & 0x8000
-        rwin = user32.GetAsyncKeyState(0x5C) & 0x8000
-        if ctrl or alt or lwin or rwin:
-            return
+        if self.modifiers & (CTRL_MASK | ALT_MASK | WIN_MASK):
+            return False
 
         # --- Text mode: pure QWERTY typing (no chord mechanics) ---
         if self.engine.mode == 'text':
-            # Backspace in text mode: track and pass through
+            # Keys not held back go straight to the app, so while queued
+            # edits or expansions may still retype the text before the
+            # cursor they are replayed by the output worker instead
+            if not self.ghost and (self.in_flight or self._edits_posted != self._edits_done):
+                return self._defer_text_key(vk, is_down)
+
+            # Backspace in text mode: track and pass through (ghost: the
+            # character was never typed, so swallow the key instead)
             if vk == VK_BACKSPACE:
                 if is_down and not self.converting:
-                    self.engine.pop_text_char()
-                return  # Let backspace through
-
-            # Space in text mode: just pass through (send via chord now)
+                    if self.engine.pop_text_char() and self.ghost:
+                        self._post(('call', self._show_buffer, ()))
+                        return True
+                return False  # Let backspace through
+
+            # All keys in text mode: track immediately and pass through
+            # (ghost: suppress keys that type a character, space included,
+            # so the buffer keeps its word separators)
+            if self.converting:
+                return False
             if vk == VK_SPACE:
-                return  # Let space through
-
-            # All keys in text mode: pass through and track immediately
-            if is_down and not self.converting:
-                char = self._vk_to_char(vk)
-                if char:
-                    self.engine.add_text_char(char)
-                    self.on_token(char)
-            return  # Pass through
+                char = ' '
+            else:
+                keymap = self.keymap
+                char = (keymap.shift if self.modifiers & SHIFT_MASK else keymap.base)[vk]
+            if char is None:
+                return False
+            if is_down:
+                self.engine.add_text_char(char)
+                self._post(('call', self.on_token, (char,)))
+                if self.ghost:
+                    self._post(('call', self._show_buffer, ()))
+            return self.ghost
 
         # --- Semantic mode: chord-based input ---
-        key_name = VK_TO_KEY.get(vk)
+        key_name = self.keymap.chord_keys[vk]
         if key_name is not None:
-            if not self.converting:
-                if is_down:
-                    self.engine.key_down(key_name)
-                    notify_held_keys(self.engine.held_keys)
-                elif is_up:
-                    result = self.engine.key_up(key_name)
-                    notify_held_keys(self.engine.held_keys)
+            with self._engine_lock:
+                if self._edits_posted != self._edits_done:
+                    # A queued action still has to edit the engine: run this
+                    # key on the output worker after it
+                    self._post_edit(('key', key_name, is_down, timestamp))
+                elif not self.converting:
+                    result = self._chord_key(key_name, is_down, timestamp)
+                    self._post(('keys', self.engine.held_keys))
                     if result is not None:
-                        self._handle_chord_result(result)
-            self._listener.suppress_event()
-            return
+                        item = ('chord', result, len(self.engine.token_buffer) > 1)
+                        if result[0] in ENGINE_ACTIONS:
+                            self._post_edit(item)
+                        else:
+                            self._post(item)
+            return True
 
         # --- Space in semantic mode: suppressed (use all-10-keys chord to send) ---
         if vk == VK_SPACE:
-            self._listener.suppress_event()
-            return
+            return True
 
         # All other keys in semantic mode: suppress (Plover-style)
-        self._listener.suppress_event()
+        return True
 
-    def _handle_chord_result(self, result):
+    def _defer_text_key(self, vk, is_down):
+        """Suppress a text-mode key and queue it for _replay_text_key."""
+        if vk in MODIFIER_BITS:
+            return False
+        if is_down:
+            if vk == VK_SPACE:
+                char = ' '
+            else:
+                keymap = self.keymap
+                char = (keymap.shift if self.modifiers & SHIFT_MASK else keymap.base)[vk]
+            self._post_edit(('text', vk, char))
+        return True
+
+    def _replay_text_key(self, vk, char):
+        """Type a deferred text-mode key (output worker), in order with the
+        edits queued and the results held before it."""
+        if self._held:
+            self._held.append(('text', vk, char))  # Behind a held Enter/arrow
+            return
+        if char is not None:
+            self.engine.add_text_char(char)
+            self.type_text(char)
+            self.on_token(char)
+        elif vk == VK_BACKSPACE:
+            self.engine.pop_text_char()
+            self.send_backspace(1)
+        elif vk in TEXT_CURSOR_KEYS:
+            # Held until the expansions have landed, like the chords
+            self._handle_chord_result(TEXT_CURSOR_KEYS[vk])
+        elif self.in_flight:
+            # Other keys (Home, End, Page Up...) may move away from the
+            # text too: also held until the expansions have landed
+            self.hold(('text', vk, None))
+        else:
+            self.send_key(vk)
+
+    def _handle_chord_result(self, result, spaced=False):
+        """Run a chord result (output worker). spaced: the token had tokens
+        before it in the buffer when it fired."""
         try:
             action = result[0]
+            if action in CURSOR_ACTIONS and self.in_flight:
+                self.hold(result)
+                return
             if action == 'token':
                 token = result[1]
-                # Type token with space separator if not first
-                if len(self.engine.token_buffer) > 1:
-                    controller.type(' ' + token)
-                else:
-                    controller.type(token)
+                if not self.ghost:
+                    # Type token with space separator if not first
+                    self.type_text(' ' + token if spaced else token)
                 self.on_token(token)
+            elif action == 'sequence':
+                # Replace the tokens typed by the earlier strokes
+                phrase, replaced = result[1], result[2]
+                if not self.ghost:
+                    self.replace_text(len(' '.join(replaced)), phrase)
+                self.on_token(phrase)
             elif action == 'type_chars':
                 # Text mode: type chord keys as regular characters
                 chars = result[1]
+                if not self.ghost:
+                    self.type_text(''.join(chars))
                 for char in chars:
-                    controller.type(char)
                     self.engine.add_text_char(char)
                 self.on_token(''.join(chars))
             elif action == 'send_ai':
@@ -289,43 +567,60 @@ class KeyboardHook:
             elif action == 'arrow':
                 direction = result[1]
                 self._send_arrow(direction)
+            elif action == 'suggest':
+                # Near-miss chord: offer the nearest chords in the overlay
+                notify_suggestions(result[1])
             elif action == 'invalid':
                 pass  # Silent
         except Exception as e:
-            print(f"Chord handler error: {e}", flush=True)
-            traceback.print_exc()
-            sys.stdout.flush()
+            log.exception("Chord handler error: %s", e)
 
     @staticmethod
     def type_text(text):
-        controller.type(text)
+        _get_injector().submit(0, text)
+
+    @staticmethod
+    def replace_text(count, text):
+        """Delete count characters and type text, as one injected batch."""
+        _get_injector().submit(count, text)
+
+    @staticmethod
+    def edit_text(old, new):
+        """Turn on-screen text old (ending at the cursor) into new, injecting
+        only the changed suffix. Returns the (deletions, text) edit."""
+        deletions, text = minimal_edit(old, new)
+        _get_injector().submit(deletions, text)
+        return deletions, text
 
     @staticmethod
     def send_backspace(count=1):
-        """Send backspace keystrokes with small delays for reliability."""
-        for _ in range(count):
-            controller.tap(Key.backspace)
-            time.sleep(0.01)  # 10ms delay between backspaces
+        _get_injector().submit(count, '')
+
+    @staticmethod
+    def send_key(vk):
+        """Press and release a key by virtual-key code."""
+        _get_injector().tap(vk)
 
     @staticmethod
     def send_enter():
-        controller.tap(Key.enter)
+        _get_injector().tap('enter')
 
     @staticmethod
     def send_ctrl_backspace():
         """Send Ctrl+Backspace to delete the previous word."""
-        with controller.pressed(Key.ctrl):
-            controller.tap(Key.backspace)
+        _get_injector().ctrl_backspace()
 
     @staticmethod
     def _send_arrow(direction):
         """Send arrow key press."""
-        arrow_keys = {
-            'left': Key.left,
-            'right': Key.right,
-            'up': Key.up,
-            'down': Key.down,
-        }
-        key = arrow_keys.get(direction)
-        if key:
-            controller.tap(key)
+        if direction in ('left', 'right', 'up', 'down'):
+            _get_injector().tap(direction)
+
+
+def _format_ns(ns):
+    if ns < 1000:
+        return f'{ns}ns'
+    if ns < 1000000:
+        return f'{ns // 1000}us'
+    return f'{ns // 1000000}ms'
+
@@ -0,0 +1,129 @@
+"""Per-layout key tables: VK -> character (text mode) and VK -> chord key.
+
+Each Keymap holds flat 256-entry lists indexed by virtual-key code:
+  base, shift   character the key types without/with Shift (None if none)
+  chord_keys    chord key name at that key's physical position (or None)
+
+Chord keys are defined by physical position (scan code), so the chord
+layout stays on the same fingers under AZERTY, QWERTZ, Dvorak, etc. The US
+tables are built from config and are used wherever the OS layout can't be
+queried; Windows layouts are compiled once per HKL with ToUnicodeEx.
+"""
+
+import ctypes
+
+from config import VK_TO_KEY
+
+# Set-1 scan codes of the chord keys (US A/S/D/F/C and M/J/K/L/; positions)
+CHORD_SCANCODES = {
+    'a': 0x1E, 's': 0x1F, 'd': 0x20, 'f': 0x21, 'c': 0x2E,
+    'm': 0x32, 'j': 0x24, 'k': 0x25, 'l': 0x26, ';': 0x27,
+}
+
+# US punctuation keys: VK -> (base, shift)
+_US_OEM = {
+    0xBA: (';', ':'), 0xBB: ('=', '+'), 0xBC: (',', '<'), 0xBD: ('-', '_'),
+    0xBE: ('.', '>'), 0xBF: ('/', '?'), 0xC0: ('`', '~'), 0xDB: ('[', '{'),
+    0xDC: ('\\', '|'), 0xDD: (']', '}'), 0xDE: ("'", '"'),
+}
+
+
+class Keymap:
+    __slots__ = ('layout', 'base', 'shift', 'chord_keys')
+
+    def __init__(self, layout, base, shift, chord_keys):
+        self.layout = layout
+        self.base = base
+        self.shift = shift
+        self.chord_keys = chord_keys
+
+
+def _us_keymap():
+    base = [None] * 256
+    shift = [None] * 256
+    for vk in range(0x41, 0x5B):  # A-Z
+        base[vk] = chr(vk).lower()
+        shift[vk] = chr(vk)
+    for vk, char in zip(range(0x30, 0x3A), ')!@#$%^&*('):  # 0-9
+        base[vk] = chr(vk)
+        shift[vk] = char
+    for vk, (b, s) in _US_OEM.items():
+        base[vk] = b
+        shift[vk] = s
+    chord_keys = [None] * 256
+    for vk, key in VK_TO_KEY.items():
+        chord_keys[vk] = key
+    return Keymap('us', base, shift, chord_keys)
+
+
+US_KEYMAP = _us_keymap()
+
+
+# =============================================================================
+# WINDOWS LAYOUTS
+# =============================================================================
+
+_MAPVK_VSC_TO_VK = 1
+_TOUNICODE_NO_STATE_CHANGE = 0x4  # Don't disturb dead-key state (Win10 1607+)
+
+_win32_keymaps = {}  # HKL -> Keymap
+_user32 = None
+
+
+def _win32():
+    global _user32
+    if _user32 is None:
+        user32 = ctypes.windll.user32
+        user32.GetForegroundWindow.restype = ctypes.c_void_p
+        user32.GetWindowThreadProcessId.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
+        user32.GetKeyboardLayout.restype = ctypes.c_void_p
+        user32.MapVirtualKeyExW.argtypes = [ctypes.c_uint, ctypes.c_uint, ctypes.c_void_p]
+        user32.ToUnicodeEx.argtypes = [
+            ctypes.c_uint, ctypes.c_uint, ctypes.POINTER(ctypes.c_ubyte),
+            ctypes.c_wchar_p, ctypes.c_int, ctypes.c_uint, ctypes.c_void_p,
+        ]
+        _user32 = user32
+    return _user32
+
+
+def win32_layout():
+    """HKL of the foreground window's keyboard layout."""
+    user32 = _win32()
+    thread = user32.GetWindowThreadProcessId(user32.GetForegroundWindow(), None)
+    return user32.GetKeyboardLayout(thread)
+
+
+def _compile_win32(hkl):
+    user32 = _win32()
+    state = (ctypes.c_ubyte * 256)()
+    buf = ctypes.create_unicode_buffer(8)
+    layers = []
+    for shift in (False, True):
+        state[0x10] = 0x80 if shift else 0
+        table = [None] * 256
+        for vk in range(256):
+            scan = user32.MapVirtualKeyExW(vk, 0, hkl)  # MAPVK_VK_TO_VSC
+            n = user32.ToUnicodeEx(vk, scan, state, buf, len(buf),
+                                   _TOUNICODE_NO_STATE_CHANGE, hkl)
+            # n < 0: dead key (no character on its own); > 1: ligature
+            if n == 1 and buf[0] >= ' ':
+                table[vk] = buf[0]
+        layers.append(table)
+    chord_keys = [None] * 256
+    for key, scan in CHORD_SCANCODES.items():
+        vk = user32.MapVirtualKeyExW(scan, _MAPVK_VSC_TO_VK, hkl)
+        if vk:
+            chord_keys[vk] = key
+    return Keymap(hkl, layers[0], layers[1], chord_keys)
+
+
+def win32_keymap(hkl):
+    """Keymap for a Windows layout, compiled on first use."""
+    keymap = _win32_keymaps.get(hkl)
+    if keymap is None:
+        try:
+            keymap = _compile_win32(hkl)
+        except (OSError, AttributeError):
+            keymap = US_KEYMAP
+        _win32_keymaps[hkl] = keymap
+    return keymap
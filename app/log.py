@@ -0,0 +1,150 @@
+"""Asynchronous logger: a ring buffer drained by a background thread.
+
+Calls like log.info("Token: %s", token) only append a record tuple to a
+preallocated ring; message formatting and the (blocking) write happen on the
+drain thread, batched. Writers never take a lock: each record gets a slot
+from an atomic counter, and if the drain thread falls a full ring behind,
+the oldest records are overwritten and counted as dropped.
+
+Records below the level (set_level, default INFO) are discarded with
+a single comparison, so debug logging on hot paths costs almost nothing when
+disabled. Hot-path callers can also check `log.enabled(DEBUG)` first.
+"""
+
+import atexit
+import itertools
+import sys
+import threading
+import time
+import traceback
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: 'DEBUG', INFO: 'INFO', WARNING: 'WARNING', ERROR: 'ERROR'}
+
+RING_SIZE = 4096        # Records buffered between drains
+DRAIN_INTERVAL = 0.05   # Seconds between drains
+
+_level = INFO
+_ring = [None] * RING_SIZE
+_next_slot = itertools.count()  # next() is atomic under the GIL
+_read = 0                       # Next sequence number to drain
+_dropped = 0
+_drain_lock = threading.Lock()  # Drain thread vs. flush(); writers never take it
+_thread = None
+_stream = sys.stdout
+
+
+def set_level(level):
+    """Set the minimum level (number or name like 'DEBUG')."""
+    global _level
+    if isinstance(level, str):
+        names = {name: value for value, name in LEVEL_NAMES.items()}
+        level = names[level.upper()]
+    _level = level
+
+
+def enabled(level):
+    return level >= _level
+
+
+def _log(level, msg, args):
+    seq = next(_next_slot)
+    _ring[seq % RING_SIZE] = (seq, time.time(), level, msg, args)
+
+
+def debug(msg, *args):
+    if DEBUG >= _level:
+        _log(DEBUG, msg, args)
+
+
+def info(msg, *args):
+    if INFO >= _level:
+        _log(INFO, msg, args)
+
+
+def warning(msg, *args):
+    if WARNING >= _level:
+        _log(WARNING, msg, args)
+
+
+def error(msg, *args):
+    if ERROR >= _level:
+        _log(ERROR, msg, args)
+
+
+def exception(msg, *args):
+    """error() plus the current exception's traceback (formatted now)."""
+    if ERROR >= _level:
+        _log(ERROR, msg + '\n%s', args + (traceback.format_exc().rstrip(),))
+
+
+def _format(record):
+    _, created, level, msg, args = record
+    if args:
+        try:
+            msg = msg % args
+        except (TypeError, ValueError):
+            msg = f'{msg} {args!r}'
+    if level >= WARNING:
+        msg = f'[{LEVEL_NAMES.get(level, level)}] {msg}'
+    return msg
+
+
+def flush():
+    """Write out every buffered record."""
+    global _read, _dropped
+    with _drain_lock:
+        # Reserve a sequence number as the end marker; its slot holds a
+        # no-op record so later drains skip it
+        end = next(_next_slot)
+        _ring[end % RING_SIZE] = (end, 0.0, None, '', ())
+        lines = []
+        seq = max(_read, end - RING_SIZE + 1)
+        _dropped += seq - _read
+        while seq < end:
+            record = _ring[seq % RING_SIZE]
+            if record is None or record[0] < seq:
+                break  # Slot reserved but not written yet: next drain
+            if record[0] > seq:
+                _dropped += 1  # Overwritten by a writer that lapped us
+            elif record[2] is not None:
+                lines.append(_format(record))
+            seq += 1
+        else:
+            seq = end + 1
+        _read = seq
+        if lines:
+            _stream.write('\n'.join(lines) + '\n')
+            _stream.flush()
+
+
+def dropped():
+    return _dropped
+
+
+def _drain():
+    while True:
+        time.sleep(DRAIN_INTERVAL)
+        try:
+            flush()
+        except Exception:
+            pass  # Never let logging kill the drain thread
+
+
+def start(stream=None, level=None):
+    """Start the drain thread (idempotent)."""
+    global _thread, _stream
+    if stream is not None:
+        _stream = stream
+    if level is not None:
+        set_level(level)
+    if _thread is None:
+        flush()  # Records logged before the writer started
+        _thread = threading.Thread(target=_drain, name='log-drain', daemon=True)
+        _thread.start()
+        atexit.register(flush)
+
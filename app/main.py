@@ -3,6 +3,7 @@
 Flow:
   1. User chords keys → token typed into focused app immediately
   2. All 10 keys → tokens sent to AI → AI result replaces typed tokens
+     (chording continues meanwhile; results land in the order sent)
   3. C+; → backspace (deletes last token/char, or undo last expansion)
   4. C+M → enter (new line)
   5. C+J → search popup (find tokens by name)
@@ -27,30 +28,62 @@ Context Memory:
 
 import sys
 import os
-import time
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+import log
 from chord_engine import ChordEngine
 from ai_engine import AIEngine
 from keyboard_hook import KeyboardHook
+from expansions import PendingExpansions
+from event_sources import create_source
 from tray import TrayApp
 from feedback import beep_toggle_on, beep_toggle_off, beep_mode_semantic, beep_mode_text, beep_undo, beep_clear_context
-from config import get_groq_api_key
+from config import (
+    get_groq_api_key, get_fire_mode, get_rollover_window, get_sequence_timeout,
+    get_repeat_delay, get_repeat_rate, get_ghost_buffer, get_ai_stream,
+    get_pack_dir, get_ngram_path, get_ngram_size, get_autocorrect_mode,
+    get_event_source, get_log_level, get_cache_path, get_cache_size,
+    get_ai_pool_size, get_ai_keepalive,
+    get_speculate, get_speculate_debounce, get_speculate_per_minute,
+)
 from overlay import start_overlay
 from search_popup import toggle_search
 from language_popup import open_language_popup
+from vocab_packs import VocabPackWatcher
+from expansion_cache import ExpansionCache
+from predictor import NgramModel
+from autocorrect import ChordCorrector, CORRECT_OFF
 
 
 def main():
-    engine = ChordEngine()
-    pending_chars = [0]
+    log.start(level=get_log_level())
+
+    # Next-token model, learned from every sent buffer
+    predictor = NgramModel(get_ngram_path(), max_ngrams=get_ngram_size())
+    predictor.load()
+
+    corrector = None
+    if get_autocorrect_mode() != CORRECT_OFF:
+        corrector = ChordCorrector(predictor, get_autocorrect_mode())
+
+    engine = ChordEngine(
+        fire_mode=get_fire_mode(),
+        rollover_window=get_rollover_window(),
+        sequence_timeout=get_sequence_timeout(),
+        corrector=corrector,
+        repeat_delay=get_repeat_delay(),
+        repeat_interval=1.0 / get_repeat_rate(),
+    )
+    # Ghost-buffer mode: tokens stay in the overlay and only the final
+    # expansion (or the raw tokens, on error) is typed
+    ghost = get_ghost_buffer()
     context_size = [0]  # Track context turns for display
 
     # Track last expansion for undo capability
     last_expansion = {
         'tokens': '',        # Original tokens sent to AI
-        'result_len': 0,     # Length of AI result (to delete on undo)
+        'result': '',        # AI result on screen (replaced on undo)
         'can_undo': False,   # Whether undo is available
     }
 
@@ -64,41 +97,60 @@ def main():
 
     def on_language_change(code, name):
         """Called when AI output language changes."""
-        print(f"  Language: {name} ({code})", flush=True)
-
-    def on_ai_result(text):
-        count = pending_chars[0]
-        pending_chars[0] = 0
-        ctx = f" [ctx:{context_size[0]}]" if context_size[0] > 0 else ""
-        print(f"  AI{ctx}: {text}", flush=True)
-        if count > 0:
-            KeyboardHook.send_backspace(count)
-            time.sleep(0.05)
-        KeyboardHook.type_text(text)
-        hook.converting = False
-
-        # Store for undo - expansion is now undoable
-        last_expansion['result_len'] = len(text)
-        last_expansion['can_undo'] = True
-        print(f"  (C+; to undo)", flush=True)
-
-    def on_ai_error(tokens, error):
-        pending_chars[0] = 0
-        hook.converting = False
-        last_expansion['can_undo'] = False
-        print(f"  AI error: {error}", flush=True)
+        log.info("  Language: %s (%s)", name, code)
+
+    # AI callbacks come from AIEngine threads, in sequence order; the screen
+    # is edited on the hook's output worker, in order with typed tokens
+    def on_ai_chunk(text, seq):
+        hook.run_edit(pending.show_chunk, text, seq)
+
+    def on_ai_result(text, seq):
+        hook.run_edit(pending.deliver, text, seq)
+
+    def on_ai_error(tokens, error, seq):
+        hook.run_edit(pending.deliver, tokens, seq, error)
+
+    def on_delivered(request, text, error):
+        """An expansion (or its tokens, on error) is on screen."""
+        if error is not None:
+            last_expansion['can_undo'] = False
+            log.warning("  AI error: %s", error)
+        else:
+            ctx = f" [ctx:{context_size[0]}]" if context_size[0] > 0 else ""
+            log.info("  AI%s: %s", ctx, text)
+            # Undoable while nothing has been typed after it
+            last_expansion['tokens'] = request['tokens']
+            last_expansion['result'] = text
+            last_expansion['can_undo'] = not pending and not engine.buffer_text()
+            if last_expansion['can_undo']:
+                log.info("  (C+; to undo)")
+
+    # Expansions of repeated buffers, kept across restarts
+    cache = None
+    if get_cache_size() > 0:
+        cache = ExpansionCache(get_cache_path(), get_cache_size())
+        cache.open()
 
     ai = AIEngine(
         on_result=on_ai_result,
         on_error=on_ai_error,
         on_context_change=on_context_change,
         on_language_change=on_language_change,
+        on_chunk=on_ai_chunk,
+        stream=get_ai_stream(),
+        cache=cache,
+        speculative=get_speculate(),
+        speculate_debounce=get_speculate_debounce(),
+        speculate_per_minute=get_speculate_per_minute(),
+        pool_size=get_ai_pool_size(),
+        keepalive_interval=get_ai_keepalive(),
     )
 
     def on_toggle():
         tray.set_enabled(hook.enabled)
+        ai.set_enabled(hook.enabled)
         status = "ON" if hook.enabled else "OFF"
-        print(f"[Engine {status}]", flush=True)
+        log.info("[Engine %s]", status)
         clear_undo()
         if hook.enabled:
             beep_toggle_on()
@@ -110,28 +162,27 @@ def main():
         clear_undo()  # Clear any previous undo state
         tokens, char_count = engine.flush_buffer()
         if tokens:
-            pending_chars[0] = char_count
-            hook.converting = True
-            # Store tokens for potential undo
-            last_expansion['tokens'] = tokens
-            last_expansion['can_undo'] = False  # Not undoable until result arrives
-            ai.expand(tokens)
+            predictor.observe(tokens.split())
+            predictor.save_later()
+            request = pending.add(tokens)
+            request['seq'] = ai.expand(tokens)
             ctx = f" [ctx:{context_size[0]}]" if context_size[0] > 0 else ""
-            print(f"  Expanding{ctx}: {tokens} ({char_count} chars)", flush=True)
+            log.info("  Expanding%s: %s (%s chars)", ctx, tokens, char_count)
             tray.set_tooltip_buffer("expanding...")
 
     def on_token(token):
         """Handle semantic token or phoneme."""
         clear_undo()  # New token typed, clear undo
+        ai.speculate(engine.buffer_text())
         buf = engine.get_buffer_display()
-        print(f"  Token: {token}  Buffer: [{buf}]", flush=True)
+        log.info("  Token: %s  Buffer: [%s]", token, buf)
         tray.set_tooltip_buffer(buf)
 
     def on_search():
         """C+J chord — toggle search popup."""
-        print("  on_search called", flush=True)
-        toggle_search()
-        print("  on_search completed", flush=True)
+        log.debug("  on_search called")
+        toggle_search(predictor=predictor, context=tuple(engine.token_buffer[-2:]))
+        log.debug("  on_search completed")
 
     def on_language():
         """C+L chord — open language selector popup."""
@@ -156,30 +207,27 @@ def main():
         """C+M+; chord — clear AI context (new conversation)."""
         ai.clear_context()
         clear_undo()
-        print("  Context cleared (new conversation)", flush=True)
+        log.info("  Context cleared (new conversation)")
         beep_clear_context()
 
     def on_backspace():
         """C+; chord — undo expansion, or delete last token/char."""
         # Check if we can undo last expansion
         if last_expansion['can_undo']:
-            result_len = last_expansion['result_len']
             tokens = last_expansion['tokens']
 
-            # Delete AI result
-            KeyboardHook.send_backspace(result_len)
-            time.sleep(0.05)
-
-            # Type original tokens back
-            KeyboardHook.type_text(tokens)
+            # Replace AI result with the original tokens (ghost: delete it,
+            # the tokens go back to the off-screen buffer)
+            KeyboardHook.edit_text(last_expansion['result'], '' if ghost else tokens)
 
             # Restore tokens to buffer
             for token in tokens.split():
                 engine.token_buffer.append(token)
 
             last_expansion['can_undo'] = False
+            ai.speculate(engine.buffer_text())
             buf = engine.get_buffer_display()
-            print(f"  Undo: restored [{buf}]", flush=True)
+            log.info("  Undo: restored [%s]", buf)
             tray.set_tooltip_buffer(buf)
             beep_undo()
             return
@@ -187,9 +235,11 @@ def main():
         # In text mode, first try to delete from text_buffer
         if engine.mode == 'text' and engine.text_buffer:
             engine.pop_text_char()
-            KeyboardHook.send_backspace(1)
+            if not ghost:
+                KeyboardHook.send_backspace(1)
+            ai.speculate(engine.buffer_text())
             buf = engine.get_buffer_display()
-            print(f"  Backspace (text): Buffer: [{buf}]", flush=True)
+            log.info("  Backspace (text): Buffer: [%s]", buf)
             tray.set_tooltip_buffer(buf)
             return
 
@@ -200,14 +250,20 @@ def main():
             delete_len = len(token)
             if len(engine.token_buffer) > 0:
                 delete_len += 1  # Include space separator
-            KeyboardHook.send_backspace(delete_len)
+            if not ghost:
+                KeyboardHook.send_backspace(delete_len)
+            ai.speculate(engine.buffer_text())
             buf = engine.get_buffer_display()
-            print(f"  Backspace: -{token}  Buffer: [{buf}]", flush=True)
+            log.info("  Backspace: -%s  Buffer: [%s]", token, buf)
             tray.set_tooltip_buffer(buf)
+        elif hook.in_flight:
+            # Buffer empty: the previous word is an in-flight expansion's,
+            # so wait for it to land
+            hook.hold(('backspace',))
         else:
             # Buffer empty — send Ctrl+Backspace to delete previous word
             KeyboardHook.send_ctrl_backspace()
-            print("  Ctrl+Backspace (delete word)", flush=True)
+            log.info("  Ctrl+Backspace (delete word)")
 
     def on_mode_toggle():
         """S+C+M chord — toggle semantic/text mode."""
@@ -218,7 +274,7 @@ def main():
             beep_mode_semantic()
         else:
             beep_mode_text()
-        print(f"  Mode: {new_mode}", flush=True)
+        log.info("  Mode: %s", new_mode)
 
     def on_mode_change(new_mode):
         """Mode changed without toggling (e.g., Alt+Q in text mode)."""
@@ -228,7 +284,7 @@ def main():
             beep_mode_semantic()
         else:
             beep_mode_text()
-        print(f"  Mode: {new_mode}", flush=True)
+        log.info("  Mode: %s", new_mode)
 
     def on_cheatsheet():
         """C+M+K chord — show cheatsheet popup."""
@@ -253,21 +309,37 @@ def main():
         on_mode_change=on_mode_change,
         on_clear_context=on_clear_context,
         on_language=on_language,
+        source=create_source(get_event_source()),
+        ghost=ghost,
     )
+    # Expansions in flight and their text on screen
+    pending = PendingExpansions(engine, hook, ghost, on_delivered)
 
     def tray_toggle():
         hook.toggle()
         tray.set_enabled(hook.enabled)
+        ai.set_enabled(hook.enabled)
         status = "ON" if hook.enabled else "OFF"
-        print(f"[Engine {status}] (tray)", flush=True)
+        log.info("[Engine %s] (tray)", status)
         if hook.enabled:
             beep_toggle_on()
         else:
             beep_toggle_off()
 
+    # User vocabulary packs, reloaded on change without restarting
+    packs = VocabPackWatcher(get_pack_dir(), on_hints=ai.set_prompt_hints)
+
     def tray_quit():
         hook.stop()
+        for line in hook.latency_report():
+            log.info("%s", line)
         ai.stop()
+        packs.stop()
+        if cache is not None:
+            stats = cache.stats()
+            log.info("Expansion cache: %d hits, %d misses, %d entries",
+                     stats['hits'], stats['misses'], stats['entries'])
+            cache.close()
 
     tray = TrayApp(
         on_toggle=tray_toggle,
@@ -299,8 +371,9 @@ def main():
     print("=" * 50, flush=True)
 
     # Start overlay for chord preview
-    start_overlay()
+    start_overlay(predictor)
 
+    packs.start()
     ai.start()
     hook.start()
     tray.run()
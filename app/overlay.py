@@ -1,9 +1,13 @@
-"""Floating overlay: shows possible chord completions as keys are held."""
+"""Floating overlay: shows possible chord completions as keys are held.
+
+In ghost-buffer mode it also shows the pending (not yet typed) buffer.
+"""
 
 import queue
 import threading
 import tkinter as tk
-from chord_engine import SEMANTICS, LEFT_KEY_ORDER, RIGHT_KEY_ORDER
+import log
+from chord_engine import LEFT_KEY_ORDER, RIGHT_KEY_ORDER, KEY_BITS, CODE_KEYS, find_completions
 
 # Global queue for thread-safe updates
 _update_queue = queue.Queue()
@@ -31,12 +35,28 @@ CATEGORIES = {
 }
 
 
+def rank_completions(held_mask, scores=None):
+    """Completions for held_mask, in display order.
+
+    Ready chords come first, then (with next-token scores) the most likely
+    tokens, then the fewest remaining keys.
+    """
+    matches = find_completions(held_mask)
+    if scores is not None:
+        matches.sort(key=lambda x: (x[0] > 0, -scores.get(x[2], 0.0), x[0], x[2]))
+    else:
+        matches.sort(key=lambda x: (x[0], x[2]))
+    return matches
+
+
 class ChordOverlay:
     """Transparent floating window showing chord possibilities."""
 
-    def __init__(self):
+    def __init__(self, predictor=None):
         global _overlay_instance
         _overlay_instance = self
+        self.predictor = predictor  # NgramModel for ranking, or None
+        self.context = ()           # Last tokens in the buffer
 
         self.root = tk.Tk()
         self.root.withdraw()  # Hide main window
@@ -78,29 +98,31 @@ class ChordOverlay:
         )
         self.content.pack(fill='both', expand=True)
 
+        # Pending buffer (ghost-buffer mode)
+        self.buffer_label = tk.Label(
+            self.frame,
+            text='',
+            font=('Consolas', 11),
+            fg='#ce9178',
+            bg='#1e1e1e',
+            anchor='w',
+            justify='left',
+            wraplength=360
+        )
+        self.buffer_label.pack(fill='x', pady=(6, 0))
+
         # Position in bottom-right corner
         self._position_window()
 
         # Track state
         self.visible = False
         self.current_keys = set()
+        self.pending_sequences = []  # (remaining chords, phrase) continuations
+        self._sequence_expiry = None
+        self.suggestions = []  # (chord, token) nearest to a missed chord
+        self._suggestion_expiry = None
+        self.buffer = ''  # Pending text not yet typed (ghost-buffer mode)
 
-        # Build lookup for efficient filtering
-        self._build_prefix_lookup()
-
-    def _build_prefix_lookup(self):
-        """Build a lookup for finding tokens by held keys."""
-        self.prefix_lookup = {}
-
-        for chord, token in SEMANTICS.items():
-            parts = chord.split('+')
-            left = frozenset(p for p in parts if p in LEFT_KEY_ORDER)
-            right = frozenset(p for p in parts if p in RIGHT_KEY_ORDER)
-            all_keys = left | right
-
-            # Store by sorted key tuple for consistent matching
-            key = tuple(sorted(all_keys))
-            self.prefix_lookup[key] = (chord, token, left, right)
 
     def _position_window(self):
         """Position overlay in bottom-right corner of screen."""
@@ -129,24 +151,35 @@ class ChordOverlay:
         self.current_keys = set(k.upper() if k != ';' else ';' for k in held_keys)
 
         if not held_keys:
-            self.hide()
+            if self.suggestions:
+                self.header.config(text='DID YOU MEAN')
+                self.content.config(text='\n'.join(
+                    f'  {chord} -> {token}' for chord, token in self.suggestions[:6]))
+                self.show()
+            elif self.pending_sequences:
+                self.header.config(text='SEQUENCE')
+                self.content.config(text='\n'.join(self._sequence_lines()))
+                self.show()
+            elif self.buffer:
+                self.header.config(text='PENDING')
+                self.content.config(text='')
+                self.show()
+            else:
+                self.hide()
             return
-
-        # Find matching tokens
-        matches = []
-        held_upper = set(k.upper() if k != ';' else k for k in held_keys)
-
-        for key_tuple, (chord, token, left, right) in self.prefix_lookup.items():
-            chord_keys = set(key_tuple)
-            # Check if held keys are a subset of this chord's keys
-            if held_upper <= chord_keys:
-                remaining = chord_keys - held_upper
-                matches.append((len(remaining), chord, token, remaining))
-
-        # Sort by remaining keys needed (closest matches first)
-        matches.sort(key=lambda x: (x[0], x[2]))
-
-        if not matches:
+        self._clear_suggestions()
+
+        # Find matching tokens (chords whose code contains the held mask)
+        held_upper = self.current_keys
+        held_mask = 0
+        for k in held_keys:
+            held_mask |= KEY_BITS.get(k.lower(), 0)
+        scores = None
+        if self.predictor is not None:
+            scores = self.predictor.distribution(self.context)
+        matches = rank_completions(held_mask, scores)
+
+        if not matches and not self.buffer:
             self.hide()
             return
 
@@ -171,6 +204,10 @@ class ChordOverlay:
         shown = 0
         max_show = 12
 
+        if self.pending_sequences:
+            lines.extend(self._sequence_lines())
+            lines.append('')
+
         # Group by remaining key count
         exact = [(c, t, r) for rem, c, t, r in matches if rem == 0]
         partial = [(c, t, r) for rem, c, t, r in matches if rem > 0]
@@ -186,12 +223,59 @@ class ChordOverlay:
                 lines.append('')
             lines.append('--- ADD KEYS ---')
             for chord, token, remaining in partial[:max_show - shown]:
-                remaining_str = '+'.join(sorted(remaining))
+                remaining_str = '+'.join(k.upper() for k in CODE_KEYS[remaining])
                 lines.append(f'  +{remaining_str} -> {token}')
 
         self.content.config(text='\n'.join(lines))
         self.show()
 
+    def _sequence_lines(self, limit=4):
+        lines = ['--- CONTINUE ---']
+        for chords, phrase in self.pending_sequences[:limit]:
+            lines.append(f'  {chords} -> {phrase}')
+        return lines
+
+    def set_sequences(self, continuations, timeout_ms):
+        """Show multi-stroke continuations until the next stroke or timeout."""
+        self.pending_sequences = continuations
+        if self._sequence_expiry is not None:
+            self.root.after_cancel(self._sequence_expiry)
+            self._sequence_expiry = None
+        if continuations:
+            self._sequence_expiry = self.root.after(timeout_ms, self._expire_sequences)
+        self.update(self.current_keys)
+
+    def _expire_sequences(self):
+        self._sequence_expiry = None
+        self.pending_sequences = []
+        self.update(self.current_keys)
+
+    def set_suggestions(self, suggestions, timeout_ms=3000):
+        """Show nearest chords for a missed chord until the next keys or timeout."""
+        self._clear_suggestions()
+        self.suggestions = suggestions
+        self._suggestion_expiry = self.root.after(timeout_ms, self._expire_suggestions)
+        self.update(self.current_keys)
+
+    def _clear_suggestions(self):
+        if self._suggestion_expiry is not None:
+            self.root.after_cancel(self._suggestion_expiry)
+            self._suggestion_expiry = None
+        self.suggestions = []
+
+    def _expire_suggestions(self):
+        self._suggestion_expiry = None
+        self.suggestions = []
+        self.update(self.current_keys)
+
+    def set_buffer(self, text, limit=120):
+        """Show the pending buffer (empty hides it)."""
+        self.buffer = text
+        if len(text) > limit:
+            text = '...' + text[-limit:]
+        self.buffer_label.config(text=f'> {text}' if text else '')
+        self.update(self.current_keys)
+
     def show(self):
         """Show the overlay."""
         if not self.visible:
@@ -209,8 +293,18 @@ class ChordOverlay:
         """Check for updates from keyboard hook thread."""
         try:
             while True:
-                held_keys = _update_queue.get_nowait()
-                self.update(held_keys)
+                kind, payload = _update_queue.get_nowait()
+                if kind == 'keys':
+                    self.update(payload)
+                elif kind == 'context':
+                    self.context = payload
+                elif kind == 'suggestions':
+                    self.set_suggestions(payload)
+                elif kind == 'buffer':
+                    self.set_buffer(payload)
+                else:
+                    continuations, timeout_ms = payload
+                    self.set_sequences(continuations, timeout_ms)
         except queue.Empty:
             pass
         # Schedule next check
@@ -231,21 +325,58 @@ class ChordOverlay:
 
 
 def notify_held_keys(held_keys):
-    """Thread-safe function to update overlay with held keys."""
+    """Thread-safe function to update overlay with held keys.
+
+    Frozensets (what ChordEngine.held_keys returns) are queued as-is.
+    """
+    if not isinstance(held_keys, frozenset):
+        held_keys = frozenset(held_keys)
     try:
-        _update_queue.put_nowait(set(held_keys))
+        _update_queue.put_nowait(('keys', held_keys))
     except:
         pass  # Queue full or other error, ignore
 
 
-def start_overlay():
+def notify_sequences(continuations, timeout=1.0):
+    """Thread-safe function to show pending multi-stroke continuations."""
+    try:
+        _update_queue.put_nowait(('sequences', (continuations, int(timeout * 1000))))
+    except:
+        pass
+
+
+def notify_context(tokens):
+    """Thread-safe function to set the buffer context used for ranking."""
+    try:
+        _update_queue.put_nowait(('context', tokens))
+    except:
+        pass
+
+
+def notify_suggestions(suggestions):
+    """Thread-safe function to offer (chord, token) corrections."""
+    try:
+        _update_queue.put_nowait(('suggestions', suggestions))
+    except:
+        pass
+
+
+def notify_buffer(text):
+    """Thread-safe function to show the pending (ghost) buffer."""
+    try:
+        _update_queue.put_nowait(('buffer', text))
+    except:
+        pass
+
+
+def start_overlay(predictor=None):
     """Start overlay in a background thread."""
     def _run():
         try:
-            overlay = ChordOverlay()
+            overlay = ChordOverlay(predictor)
             overlay.run()
         except Exception as e:
-            print(f"Overlay error: {e}", flush=True)
+            log.error("Overlay error: %s", e)
 
     thread = threading.Thread(target=_run, daemon=True)
     thread.start()
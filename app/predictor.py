@@ -0,0 +1,198 @@
+"""Next-token prediction: n-gram counts over sent token sequences.
+
+The model learns from every buffer sent to the AI and, if given a path, is
+persisted as JSON lines: a snapshot of the counts followed by one line per
+message observed since, so saving a message appends a line instead of
+rewriting the file. The file is compacted back to one snapshot when the
+appended lines outgrow it or the table is pruned. The table is capped at
+max_ngrams entries; past that the least frequent n-grams are dropped.
+
+The overlay and search popup use it to rank candidates by how likely they
+are to follow the tokens already in the buffer.
+"""
+
+import json
+import os
+import threading
+
+import log
+
+BOS = '<s>'       # Start-of-message context marker
+BACKOFF = 0.4     # Stupid-backoff weight per dropped context token
+PRUNE_SLACK = 1.25  # Prune once the table is this much over max_ngrams
+COMPACT_LINES = 1000  # Min appended lines before compacting the file
+
+
+class NgramModel:
+    """Token n-gram model with stupid-backoff scoring."""
+
+    def __init__(self, path=None, order=3, max_ngrams=20000):
+        self.path = path
+        self.order = order
+        self.max_ngrams = max_ngrams
+        self._counts = {}  # context tuple -> {token: count}
+        self._totals = {}  # context tuple -> sum of counts
+        self._size = 0     # (context, token) entries in _counts
+        self._unsaved = []  # Messages observed since the last write
+        self._appended = 0  # Message lines after the snapshot in the file
+        self._compact = True  # Next write rewrites the whole file
+        self._lock = threading.Lock()
+        self._cached_context = None
+        self._cached_scores = {}
+        self._save_wanted = threading.Event()
+        self._writer = None  # Thread running _write_loop, started on demand
+
+    def observe(self, tokens):
+        """Add one sent message (list of tokens) to the counts."""
+        tokens = list(tokens)
+        with self._lock:
+            self._observe(tokens)
+            if self.path:
+                self._unsaved.append(tokens)
+            self._cached_context = None
+
+    def _observe(self, tokens):
+        history = [BOS] + tokens
+        for i in range(1, len(history)):
+            token = history[i]
+            for n in range(min(self.order, i + 1)):
+                context = tuple(history[i - n:i])
+                following = self._counts.setdefault(context, {})
+                count = following.get(token, 0)
+                following[token] = count + 1
+                self._totals[context] = self._totals.get(context, 0) + 1
+                if not count:
+                    self._size += 1
+        if self._size > self.max_ngrams * PRUNE_SLACK:
+            self._prune()
+
+    def _prune(self):
+        """Drop the least frequent n-grams down to max_ngrams."""
+        ranked = sorted((count, context, token)
+                        for context, following in self._counts.items()
+                        for token, count in following.items())
+        for count, context, token in ranked[:self._size - self.max_ngrams]:
+            following = self._counts[context]
+            del following[token]
+            if following:
+                self._totals[context] -= count
+            else:
+                del self._counts[context]
+                del self._totals[context]
+        self._size = min(self._size, self.max_ngrams)
+        self._compact = True  # The file's lines no longer replay to this
+
+    def distribution(self, context):
+        """Scores for the token following context, as a token -> float dict.
+
+        Cached for the most recent context, so ranking many candidates
+        against the same buffer costs one dict lookup each.
+        """
+        context = ((BOS,) + tuple(context))[-(self.order - 1):]
+        with self._lock:
+            if context == self._cached_context:
+                return self._cached_scores
+            scores = {}
+            weight = 1.0
+            # Longest context first; shorter ones only fill in unseen tokens
+            for n in range(len(context), -1, -1):
+                ctx = context[len(context) - n:]
+                following = self._counts.get(ctx)
+                if following:
+                    total = self._totals[ctx]
+                    for token, count in following.items():
+                        if token not in scores:
+                            scores[token] = weight * count / total
+                weight *= BACKOFF
+            self._cached_context = context
+            self._cached_scores = scores
+            return scores
+
+    def score(self, context, token):
+        return self.distribution(context).get(token, 0.0)
+
+    def load(self):
+        """Load counts from path (missing or corrupt files start empty)."""
+        if not self.path:
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                lines = [json.loads(line) for line in f if line.strip()]
+        except (OSError, ValueError):
+            return
+        if not lines or lines[0].get('order') != self.order:
+            return
+        with self._lock:
+            self._counts.clear()
+            self._totals.clear()
+            self._size = 0
+            for *context, token, count in lines[0].get('ngrams', []):
+                context = tuple(context)
+                self._counts.setdefault(context, {})[token] = count
+                self._totals[context] = self._totals.get(context, 0) + count
+                self._size += 1
+            self._compact = False
+            for line in lines[1:]:
+                self._observe(line.get('observe', []))  # Prunes if needed
+            self._appended = len(lines) - 1
+            self._cached_context = None
+
+    def save(self):
+        """Write messages observed since the last save: appended as lines, or
+        as a fresh snapshot when the file needs compacting."""
+        if not self.path:
+            return
+        with self._lock:
+            pending, self._unsaved = self._unsaved, []
+            compact = (self._compact or not os.path.exists(self.path)
+                       or self._appended + len(pending) > max(COMPACT_LINES, self._size // 10))
+            if compact:
+                ngrams = [[*context, token, count]
+                          for context, following in self._counts.items()
+                          for token, count in following.items()]
+                self._compact = False
+                self._appended = 0
+            else:
+                self._appended += len(pending)
+        try:
+            if compact:
+                self._write_snapshot(ngrams)
+            elif pending:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    for tokens in pending:
+                        f.write(json.dumps({'observe': tokens}) + '\n')
+        except OSError:
+            with self._lock:
+                self._compact = True  # Rewrite everything next time
+            raise
+
+    def _write_snapshot(self, ngrams):
+        """Replace the file with one snapshot line, atomically."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f'{self.path}.{threading.get_ident()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'order': self.order, 'ngrams': ngrams}, f)
+            f.write('\n')
+        os.replace(tmp, self.path)
+
+    def save_later(self):
+        """Save on the writer thread; requests made while it is busy are
+        coalesced into one more save."""
+        if not self.path:
+            return
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, daemon=True)
+                self._writer.start()
+        self._save_wanted.set()
+
+    def _write_loop(self):
+        while True:
+            self._save_wanted.wait()
+            self._save_wanted.clear()
+            try:
+                self.save()
+            except OSError as e:
+                log.warning("N-gram model save failed: %s", e)
@@ -1,7 +1,11 @@
 """Search popup: quickly find tokens by name."""
 
+import bisect
 import tkinter as tk
-from chord_engine import SEMANTICS, TOKEN_TO_CHORD
+import log
+from chord_engine import (
+    TOKEN_CHORDS, KEY_BITS, VOCAB_LOCK, add_vocab_listener, parse_chord,
+)
 
 # Category mapping for display
 CHORD_TO_CATEGORY = {
@@ -12,26 +16,73 @@ CHORD_TO_CATEGORY = {
 }
 
 
-def _get_category(chord):
-    """Extract category from chord string."""
-    parts = chord.split('+')
-    left_keys = [p for p in parts if p in ['A', 'S', 'D', 'F', 'C']]
-    left_combo = '+'.join(sorted(left_keys))
+# Same mapping keyed by the left-hand 5-bit code
+_CATEGORY_BY_LEFT = {parse_chord(k) >> 5: v for k, v in CHORD_TO_CATEGORY.items()}
 
-    # Check for extended (with M)
-    has_m = 'M' in parts
 
-    category = CHORD_TO_CATEGORY.get(left_combo, 'OTHER')
-    if has_m:
+def _get_category(code):
+    """Category for a chord code (+ suffix when extended with M)."""
+    category = _CATEGORY_BY_LEFT.get(code >> 5, 'OTHER')
+    if code & KEY_BITS['m']:
         category += '+'
     return category
 
 
+def _build_token_index():
+    """(token, chord, category) for every reachable token, sorted by token."""
+    return sorted((token, chord, _get_category(code))
+                  for code, (chord, token) in TOKEN_CHORDS.items())
+
+
+# Built once at import and shared by every popup
+TOKEN_INDEX = _build_token_index()
+
+
+def _on_vocab_change(changes):
+    """Patch TOKEN_INDEX for vocabulary pack changes."""
+    for code, old, new in changes:
+        if old is not None:
+            TOKEN_INDEX.remove((old[1], old[0], _get_category(code)))
+        if new is not None:
+            bisect.insort(TOKEN_INDEX, (new[1], new[0], _get_category(code)))
+
+
+add_vocab_listener(_on_vocab_change)
+
+
+def search_tokens(tokens, query, scores=None, limit=20):
+    """(token, chord, category) entries of tokens containing query.
+
+    Exact matches first, then prefix matches, then the rest; ties are
+    broken by next-token score (if given) and then alphabetically.
+    """
+    matches = []
+    with VOCAB_LOCK:
+        for token, chord, category in tokens:
+            if query in token:
+                # Prioritize exact matches and prefix matches
+                if token == query:
+                    priority = 0
+                elif token.startswith(query):
+                    priority = 1
+                else:
+                    priority = 2
+                matches.append((priority, token, chord, category))
+
+    if scores is not None:
+        matches.sort(key=lambda x: (x[0], -scores.get(x[1], 0.0), x[1]))
+    else:
+        matches.sort(key=lambda x: (x[0], x[1]))
+    return [(t, c, cat) for _, t, c, cat in matches[:limit]]
+
+
 class SearchPopup:
     """Quick search popup for finding tokens."""
 
-    def __init__(self, on_close=None):
+    def __init__(self, on_close=None, predictor=None, context=()):
         self.on_close = on_close
+        self.predictor = predictor  # NgramModel for ranking, or None
+        self.context = context      # Buffer tokens when the popup opened
         self.root = tk.Tk()
         self.root.title("Token Search")
         self.root.geometry("500x400")
@@ -102,12 +153,7 @@ class SearchPopup:
         )
         hint.pack(pady=(0, 10))
 
-        # Build token list
-        self.tokens = []
-        for chord, token in SEMANTICS.items():
-            category = _get_category(chord)
-            self.tokens.append((token, chord, category))
-        self.tokens.sort(key=lambda x: x[0])
+        self.tokens = TOKEN_INDEX
 
         # Show hint initially (no results until user types)
         self._show_hint()
@@ -121,7 +167,7 @@ class SearchPopup:
     def _check_close(self):
         """Check if close was requested from another thread."""
         if is_close_requested():
-            print("  _check_close: close detected, closing", flush=True)
+            log.debug("  _check_close: close detected, closing")
             self.close()
         else:
             self.root.after(50, self._check_close)
@@ -138,21 +184,10 @@ class SearchPopup:
             self._show_hint()
             return
 
-        # Filter tokens
-        matches = []
-        for token, chord, category in self.tokens:
-            if query in token:
-                # Prioritize exact matches and prefix matches
-                if token == query:
-                    priority = 0
-                elif token.startswith(query):
-                    priority = 1
-                else:
-                    priority = 2
-                matches.append((priority, token, chord, category))
-
-        matches.sort(key=lambda x: (x[0], x[1]))
-        results = [(t, c, cat) for _, t, c, cat in matches[:20]]
+        scores = None
+        if self.predictor is not None:
+            scores = self.predictor.distribution(self.context)
+        results = search_tokens(self.tokens, query, scores)
         self._show_results(results)
 
     def _show_hint(self):
@@ -235,7 +270,7 @@ class SearchPopup:
             if self.on_close:
                 self.on_close()
         except Exception as e:
-            print(f"Search close callback error: {e}", flush=True)
+            log.error("Search close callback error: %s", e)
         try:
             self.root.destroy()
         except:
@@ -251,31 +286,32 @@ _close_requested = False
 _search_instance = None
 
 
-def toggle_search():
+def toggle_search(predictor=None, context=()):
     """Toggle search popup - open if closed, close if open."""
     global _search_open, _close_requested, _search_instance
 
-    print(f"  toggle_search: _search_open={_search_open}", flush=True)
+    log.debug("  toggle_search: _search_open=%s", _search_open)
 
     # If open, request close
     if _search_open:
         _close_requested = True
-        print("  toggle_search: requesting close", flush=True)
+        log.debug("  toggle_search: requesting close")
         return None
 
     _search_open = True
     _close_requested = False
-    print("  toggle_search: opening new search", flush=True)
+    log.debug("  toggle_search: opening new search")
 
     import threading
 
     def _run():
         global _search_open, _search_instance
         try:
-            _search_instance = SearchPopup(on_close=_clear_ref)
+            _search_instance = SearchPopup(on_close=_clear_ref,
+                                           predictor=predictor, context=context)
             _search_instance.run()
         except Exception as e:
-            print(f"Search popup error: {e}", flush=True)
+            log.error("Search popup error: %s", e)
         finally:
             _search_open = False
             _search_instance = None
@@ -308,4 +344,4 @@ def request_search_close():
     global _close_requested
     if _search_open:
         _close_requested = True
-        print("  Search close requested", flush=True)
+        log.debug("  Search close requested")
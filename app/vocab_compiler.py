@@ -0,0 +1,151 @@
+"""Vocabulary compiler: validate chords and emit a precompiled lookup artifact.
+
+Usage:
+  python vocab_compiler.py           # check SEMANTICS, write vocab.bin
+  python vocab_compiler.py --check   # check only, exit 1 on errors
+
+The artifact holds one record per SEMANTICS entry (chord code plus indexes
+into a string pool), stamped with a hash of the SEMANTICS table it was
+compiled from. chord_engine memory-maps it at import when the hash still
+matches, and otherwise compiles in memory; only this script writes the
+artifact.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+ARTIFACT_MAGIC = b'CHVOCAB\x03'
+# magic, vocab_key of the source table, record count
+_HEADER = struct.Struct('<8s16sI')
+# Per record: code, chord, normalized chord, token (string pool indexes)
+_RECORD_FIELDS = 4
+
+
+def vocab_key(semantics):
+    """Content hash of a chord -> token table (hashing it is far cheaper
+    than compiling it)."""
+    return hashlib.blake2b(repr(semantics).encode('utf-8'), digest_size=16).digest()
+
+
+def write_artifact(path, entries, key):
+    """Write (code, chord, norm, token) entries to path atomically."""
+    strings = []
+    index = {}
+    records = array('H')
+    for code, *texts in entries:
+        records.append(code)
+        for text in texts:
+            if text not in index:
+                index[text] = len(strings)
+                strings.append(text)
+            records.append(index[text])
+    pool = '\0'.join(strings).encode('utf-8')
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(_HEADER.pack(ARTIFACT_MAGIC, key, len(entries)))
+        f.write(records.tobytes())
+        f.write(pool)
+    os.replace(tmp, path)
+
+
+def read_artifact(path, key):
+    """Memory-map an artifact. Returns its entries, or None if missing/stale."""
+    try:
+        with open(path, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if len(mm) < _HEADER.size:
+                return None
+            magic, stamp, count = _HEADER.unpack_from(mm, 0)
+            if magic != ARTIFACT_MAGIC or stamp != key:
+                return None
+            start = _HEADER.size
+            end = start + count * _RECORD_FIELDS * 2
+            records = array('H')
+            records.frombytes(mm[start:end])
+            strings = mm[end:].decode('utf-8').split('\0')
+    except (OSError, ValueError):
+        return None
+    it = iter(records)
+    return [(code, strings[c], strings[n], strings[t])
+            for code, c, n, t in zip(it, it, it, it)]
+
+
+def check_vocabulary(semantics, reserved):
+    """Validate chord strings in semantics.
+
+    reserved maps chord codes to the control/arrow action that owns them.
+    Returns a list of (level, chord, message) with level 'error' or
+    'warning'; chord is None for issues about a token rather than a chord.
+    """
+    from chord_engine import LEFT_KEY_ORDER, RIGHT_KEY_ORDER, parse_chord
+
+    issues = []
+    by_code = {}
+    chords_by_token = {}
+    for chord, token in semantics.items():
+        parts = chord.split('+')
+        unknown = [p for p in parts if p not in LEFT_KEY_ORDER and p not in RIGHT_KEY_ORDER]
+        if unknown:
+            issues.append(('error', chord, f"{chord} ({token}): unknown keys {unknown}"))
+            continue
+        if len(set(parts)) != len(parts):
+            issues.append(('error', chord, f"{chord} ({token}): repeated key"))
+        code = parse_chord(chord)
+        if not code >> 5 or not code & 31:
+            issues.append(('error', chord, f"{chord} ({token}): needs keys from both hands"))
+            continue
+        if code in by_code:
+            other, other_token = by_code[code]
+            issues.append((
+                'error', chord, f"{chord} ({token}) collides with {other} ({other_token})"))
+            continue
+        by_code[code] = (chord, token)
+        if code in reserved:
+            issues.append((
+                'warning', chord, f"{chord} ({token}) is shadowed by control chord '{reserved[code][0]}'"))
+        chords_by_token.setdefault(token, []).append(chord)
+
+    for token, chords in chords_by_token.items():
+        if len(chords) > 1:
+            issues.append((
+                'warning', None, f"{token} is on {len(chords)} chords: {', '.join(chords)}"))
+    return issues
+
+
+def reserved_chords():
+    """Chord codes owned by control/arrow actions, for check_vocabulary."""
+    import chord_engine
+
+    reserved = dict(chord_engine.ARROW_ACTIONS)
+    reserved.update(chord_engine.CONTROL_ACTIONS)
+    return reserved
+
+
+def main(argv):
+    import chord_engine
+
+    issues = check_vocabulary(chord_engine.SEMANTICS, reserved_chords())
+    for chords, phrase in chord_engine.SEQUENCES.items():
+        for chord in chords:
+            if chord_engine.SEMANTIC_ACTIONS[chord_engine.parse_chord(chord)][0] != 'token':
+                issues.append(('error', chord, f"Sequence {phrase}: {chord} is not a token chord"))
+    for level, _, message in issues:
+        print(f"{level}: {message}")
+    errors = sum(1 for level, _, _ in issues if level == 'error')
+    print(f"{len(chord_engine.SEMANTICS)} chords, {errors} errors, "
+          f"{len(issues) - errors} warnings")
+    if errors:
+        return 1
+    if '--check' not in argv:
+        write_artifact(chord_engine.VOCAB_ARTIFACT, chord_engine.VOCAB_ENTRIES,
+                       vocab_key(chord_engine.SEMANTICS))
+        print(f"Wrote {chord_engine.VOCAB_ARTIFACT}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,131 @@
+"""Vocabulary packs: extra chord -> token files merged over SEMANTICS at runtime.
+
+A pack is a .json or .toml file in the pack directory:
+
+  {
+    "chords": {"A+D+S+M+J+K+L+;": "KUBERNETES"},
+    "hints": "KUBERNETES = the container orchestration platform"
+  }
+
+The directory is polled for changes; a modified pack only rebuilds the lookup
+entries for the chords it adds or drops (see chord_engine.set_pack), and
+hints from all packs are passed to the AI prompt.
+
+Pack chords are checked with the vocab_compiler rules; entries with errors
+(unknown or repeated keys, one-handed chords, collisions within the pack)
+are skipped and logged. When two packs bind the same chord, the pack whose
+path sorts last wins.
+"""
+
+import json
+import os
+import threading
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+import log
+from chord_engine import set_pack
+from vocab_compiler import check_vocabulary, reserved_chords
+
+PACK_EXTENSIONS = ('.json', '.toml')
+
+
+def load_pack(path):
+    """Read a pack file. Returns (chords, hints)."""
+    if path.endswith('.toml'):
+        if tomllib is None:
+            raise ValueError("TOML packs need Python 3.11+")
+        with open(path, 'rb') as f:
+            data = tomllib.load(f)
+    else:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    chords = data.get('chords', {})
+    if not isinstance(chords, dict):
+        raise ValueError("'chords' must map chord strings to tokens")
+    chords = {chord.upper(): str(token) for chord, token in chords.items()}
+    name = os.path.basename(path)
+    for level, chord, message in check_vocabulary(chords, reserved_chords()):
+        if level == 'error':
+            chords.pop(chord, None)
+            log.error("  Vocab pack %s: %s (skipped)", name, message)
+        else:
+            log.warning("  Vocab pack %s: %s", name, message)
+    return chords, str(data.get('hints', ''))
+
+
+class VocabPackWatcher:
+    """Polls a directory of vocabulary packs and applies changes live."""
+
+    def __init__(self, pack_dir, on_hints=None, interval=1.0):
+        self.pack_dir = pack_dir
+        self.on_hints = on_hints  # Called with combined hint text
+        self.interval = interval
+        self._mtimes = {}  # path -> mtime of the loaded version
+        self._hints = {}   # path -> hint text
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.scan()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.scan()
+            except Exception as e:
+                log.error("Vocab pack scan error: %s", e)
+
+    def _list_packs(self):
+        try:
+            names = os.listdir(self.pack_dir)
+        except FileNotFoundError:
+            return {}
+        packs = {}
+        for name in names:
+            if name.endswith(PACK_EXTENSIONS):
+                path = os.path.join(self.pack_dir, name)
+                try:
+                    packs[path] = os.stat(path).st_mtime_ns
+                except OSError:
+                    pass
+        return packs
+
+    def scan(self):
+        """Load new/changed packs and drop deleted ones."""
+        current = self._list_packs()
+        hints_changed = False
+
+        for path in list(self._mtimes):
+            if path not in current:
+                changes = set_pack(path, None)
+                del self._mtimes[path]
+                hints_changed |= self._hints.pop(path, '') != ''
+                log.info("  Vocab pack removed: %s (%d chords)",
+                         os.path.basename(path), len(changes))
+
+        for path, mtime in sorted(current.items()):
+            if self._mtimes.get(path) == mtime:
+                continue
+            self._mtimes[path] = mtime
+            try:
+                chords, hints = load_pack(path)
+            except (OSError, ValueError) as e:
+                log.error("  Vocab pack error in %s: %s", os.path.basename(path), e)
+                continue
+            changes = set_pack(path, chords)
+            if self._hints.get(path, '') != hints:
+                self._hints[path] = hints
+                hints_changed = True
+            log.info("  Vocab pack loaded: %s (%d chords changed)",
+                     os.path.basename(path), len(changes))
+
+        if hints_changed and self.on_hints:
+            self.on_hints('\n'.join(h for h in self._hints.values() if h))
@@ -0,0 +1,144 @@
+"""Benchmark: AI request latency with connection warm-up and keep-alive.
+
+Usage:
+  python bench/bench_connection.py [--runs N] [--connect MS] [--idle S]
+                                   [--gap S] [--keepalive S] [--json FILE]
+
+Runs AIEngine (the real Groq client) against a local HTTPS stub server
+(bench/openai_stub.py, self-signed certificate) that sleeps --connect ms
+before serving each new connection, standing in for DNS/TCP/TLS round trips,
+and closes connections idle for --idle seconds. Measures expand() to
+on_result:
+  first   the first request of a new engine: cold (client created on
+          demand) vs warmed up at start()
+  steady  requests --gap seconds apart, longer than the idle timeout:
+          without vs with keep-alive pings every --keepalive seconds
+Needs the app's requirements (groq) and the openssl command line tool; no
+API key or network is used.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from openai_stub import StubServer
+
+TOKENS = 'THANKS FOR HELP PERFECT'
+
+
+class _Timer:
+    """AIEngine callbacks that time one request at a time."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error = None
+
+    def on_result(self, text, seq):
+        self.done.set()
+
+    def on_error(self, tokens, error, seq):
+        self.error = error
+        self.done.set()
+
+    def expand(self, engine):
+        self.done.clear()
+        t0 = time.perf_counter()
+        engine.expand(TOKENS)
+        self.done.wait(30)
+        if self.error:
+            raise RuntimeError(self.error)
+        engine.clear_context()
+        return time.perf_counter() - t0
+
+
+def first_request(runs, warm_up):
+    """Latency of each new engine's first expansion."""
+    from ai_engine import AIEngine
+
+    samples = []
+    for _ in range(runs):
+        timer = _Timer()
+        engine = AIEngine(timer.on_result, timer.on_error, warm_up=warm_up, keepalive_interval=0)
+        engine.start()
+        if warm_up:
+            engine.warmed.wait(30)
+        samples.append(timer.expand(engine))
+        engine.stop()
+    return samples
+
+
+def steady_state(runs, gap, keepalive):
+    """Latency of expansions gap seconds apart on one engine."""
+    from ai_engine import AIEngine
+
+    timer = _Timer()
+    engine = AIEngine(timer.on_result, timer.on_error, keepalive_interval=keepalive)
+    engine.start()
+    engine.set_enabled(True)
+    engine.warmed.wait(30)
+    samples = []
+    try:
+        for _ in range(runs):
+            time.sleep(gap)
+            samples.append(timer.expand(engine))
+    finally:
+        engine.stop()
+    return samples
+
+
+def summary(samples):
+    samples = sorted(samples)
+    return {'p50_ms': 1000 * statistics.median(samples),
+            'p90_ms': 1000 * samples[min(len(samples) - 1, int(len(samples) * 0.9))],
+            'mean_ms': 1000 * statistics.fmean(samples)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--connect', type=float, default=150, help='stub connection setup (ms)')
+    parser.add_argument('--idle', type=float, default=1.0, help='stub idle timeout (s)')
+    parser.add_argument('--gap', type=float, default=1.5, help='seconds between steady requests')
+    parser.add_argument('--keepalive', type=float, default=0.5, help='keep-alive interval (s)')
+    parser.add_argument('--json', help='write results to FILE as JSON')
+    args = parser.parse_args()
+
+    stub = StubServer(ttft=0.05, chunk_interval=0, text='Thanks for your help, perfect.',
+                      tls=True, connect_delay=args.connect / 1000, idle_timeout=args.idle).start()
+    # Read by config.get_groq_api_key, the Groq client and httpx
+    os.environ['GROQ_API_KEY'] = 'bench'
+    os.environ['GROQ_BASE_URL'] = stub.url
+    os.environ['SSL_CERT_FILE'] = stub.cert_file
+
+    print(f"stub: HTTPS, {args.connect:g} ms connection setup, {args.idle:g} s idle timeout, "
+          f"50 ms response")
+    cases = (('first', 'cold', lambda: first_request(args.runs, False)),
+             ('first', 'warmed', lambda: first_request(args.runs, True)),
+             ('steady', 'no keep-alive', lambda: steady_state(args.runs, args.gap, 0)),
+             ('steady', 'keep-alive', lambda: steady_state(args.runs, args.gap, args.keepalive)))
+    results = {}
+    for group, name, run in cases:
+        connections = stub.connections
+        stats = summary(run())
+        stats['connections'] = stub.connections - connections
+        results.setdefault(group, {})[name] = stats
+        print(f"  {group:6} {name:14} p50 {stats['p50_ms']:8.1f} ms   p90 {stats['p90_ms']:8.1f} ms"
+              f"   {stats['connections']} connections")
+    stub.stop()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'runs': args.runs, 'connect_ms': args.connect, 'idle_s': args.idle,
+                       'gap_s': args.gap, 'keepalive_s': args.keepalive,
+                       'results': results}, f, indent=2)
+        print(f"Wrote {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Microbenchmark: table dispatch vs the old string-key chord lookup.
+
+Usage:
+  python bench/bench_dispatch.py [iterations]
+
+Compares the per-chord cost of resolving a chord code through the
+precompiled action tables against the previous path (control if-chain,
+key list building, _normalize_chord, SEMANTICS_LOOKUP).
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from chord_engine import (
+    SEMANTICS, SEMANTICS_LOOKUP, SEMANTIC_ACTIONS, LEFT_KEYS, RIGHT_KEYS,
+    parse_chord, _normalize_chord,
+)
+
+
+def _code_to_keys(code):
+    keys = {k for k, bit in LEFT_KEYS.items() if code & (1 << (bit + 5))}
+    keys |= {k for k, bit in RIGHT_KEYS.items() if code & (1 << bit)}
+    return keys
+
+
+def string_path(chord_buffer):
+    """The pre-table semantic resolution, kept here as the baseline."""
+    left_code = sum(1 << LEFT_KEYS[k] for k in chord_buffer if k in LEFT_KEYS)
+    right_code = sum(1 << RIGHT_KEYS[k] for k in chord_buffer if k in RIGHT_KEYS)
+    if left_code == 31 and right_code == 31:
+        return ('send_ai',)
+    if left_code == 16 and right_code == 1:
+        return ('backspace',)
+    if left_code == 16 and right_code == 16:
+        return ('enter',)
+    if left_code == 16 and right_code == 8:
+        return ('search',)
+    if left_code == 18 and right_code == 16:
+        return ('toggle_mode',)
+    if left_code == 16 and right_code == 20:
+        return ('cheatsheet',)
+    if left_code == 16 and right_code == 17:
+        return ('clear_context',)
+    if left_code == 16 and right_code == 2:
+        return ('language',)
+    if left_code == 0:
+        if right_code == 8:
+            return ('arrow', 'left')
+        if right_code == 4:
+            return ('arrow', 'down')
+        if right_code == 2:
+            return ('arrow', 'up')
+        if right_code == 1:
+            return ('arrow', 'right')
+    left = [k.upper() for k in chord_buffer if k in LEFT_KEYS]
+    right = [k.upper() if k != ';' else ';' for k in chord_buffer if k in RIGHT_KEYS]
+    if not left or not right:
+        return ('invalid',)
+    chord_key = _normalize_chord(left, right)
+    if chord_key in SEMANTICS_LOOKUP:
+        return ('token', SEMANTICS_LOOKUP[chord_key])
+    return ('invalid',)
+
+
+def table_path(chord_code):
+    return SEMANTIC_ACTIONS[chord_code]
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    codes = [parse_chord(chord) for chord in SEMANTICS]
+    buffers = [_code_to_keys(code) for code in codes]
+
+    # Both paths must agree before timing them
+    for code, buf in zip(codes, buffers):
+        assert string_path(buf) == table_path(code), (code, buf)
+
+    def run_string():
+        for buf in buffers:
+            string_path(buf)
+
+    def run_table():
+        for code in codes:
+            table_path(code)
+
+    n = iterations * len(codes)
+    t_string = min(timeit.repeat(run_string, number=iterations, repeat=5)) / n
+    t_table = min(timeit.repeat(run_table, number=iterations, repeat=5)) / n
+
+    print(f"chords per run : {len(codes)}")
+    print(f"string path    : {t_string * 1e9:8.1f} ns/chord")
+    print(f"table path     : {t_table * 1e9:8.1f} ns/chord")
+    print(f"speedup        : {t_string / t_table:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
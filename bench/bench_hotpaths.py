@@ -0,0 +1,278 @@
+"""Benchmark suite for the chord and input hot paths.
+
+Usage:
+  python bench/bench_hotpaths.py [--events N] [--seed S]
+                                 [--replay FILE] [--record FILE]
+                                 [--json FILE]
+
+Measures per-call latency (percentiles in ns) of:
+  - ChordEngine.key_down / key_up / _fire_chord
+  - flush_buffer and get_buffer_display at large buffer sizes
+  - overlay completion filtering (overlay.rank_completions)
+  - search popup filtering (search_popup.search_tokens)
+
+Key streams are synthetic (random SEMANTICS chords with randomized press
+and release order) or replayed from a file with one JSON event per line,
+[key, is_down, timestamp], as accepted by ChordEngine.feed. --record writes
+the synthetic stream in that format. --json writes all results plus run
+metadata so numbers can be compared between releases. Runs headless: no
+display or keyboard hook is needed.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from chord_engine import (
+    SEMANTICS, TOKEN_CHORDS, CODE_KEYS, KEY_BITS, ChordEngine, parse_chord,
+)
+from overlay import rank_completions
+from predictor import NgramModel
+from search_popup import TOKEN_INDEX, search_tokens
+
+PERCENTILES = (50, 90, 99, 99.9)
+BUFFER_SIZES = (10, 100, 1000, 10000)
+SEARCH_QUERIES = ('A', 'RE', 'ING', 'MAKE', 'FUNCTION', 'ZZZ')
+
+perf_counter_ns = time.perf_counter_ns
+
+
+def percentiles(samples):
+    """Summary dict (ns) for a list of nanosecond samples."""
+    samples = sorted(samples)
+    n = len(samples)
+    summary = {'n': n}
+    for p in PERCENTILES:
+        summary[f'p{p:g}'] = samples[min(n - 1, int(n * p / 100))]
+    summary['max'] = samples[-1]
+    summary['mean'] = sum(samples) / n
+    return summary
+
+
+def timer_overhead(n=100000):
+    """Median cost of one perf_counter_ns pair, included in every sample."""
+    samples = []
+    for _ in range(n):
+        t0 = perf_counter_ns()
+        samples.append(perf_counter_ns() - t0)
+    return percentiles(samples)['p50']
+
+
+# ==================== KEY STREAMS ====================
+
+def synthetic_stream(n_chords, seed=0):
+    """(key, is_down, timestamp) events for n_chords random token chords."""
+    rng = random.Random(seed)
+    codes = [parse_chord(chord) for chord in SEMANTICS]
+    events = []
+    t = 0.0
+    for _ in range(n_chords):
+        keys = list(CODE_KEYS[rng.choice(codes)])
+        rng.shuffle(keys)
+        for key in keys:
+            t += rng.uniform(0.005, 0.03)
+            events.append((key, True, round(t, 4)))
+        rng.shuffle(keys)
+        for key in keys:
+            t += rng.uniform(0.005, 0.03)
+            events.append((key, False, round(t, 4)))
+        t += rng.uniform(0.05, 0.3)
+    return events
+
+
+def read_stream(path):
+    with open(path, encoding='utf-8') as f:
+        return [tuple(json.loads(line)) for line in f if line.strip()]
+
+
+def write_stream(path, events):
+    with open(path, 'w', encoding='utf-8') as f:
+        for event in events:
+            f.write(json.dumps(event) + '\n')
+
+
+# ==================== BENCHMARKS ====================
+
+def bench_engine_events(events):
+    """Per-event key_down and key_up latency over a key stream."""
+    engine = ChordEngine()
+    downs = []
+    ups = []
+    for key, is_down, timestamp in events:
+        if is_down:
+            t0 = perf_counter_ns()
+            engine.key_down(key, timestamp)
+            downs.append(perf_counter_ns() - t0)
+        else:
+            t0 = perf_counter_ns()
+            engine.key_up(key, timestamp)
+            ups.append(perf_counter_ns() - t0)
+        if len(engine.token_buffer) > 1000:
+            engine.token_buffer.clear()
+    return {'key_down': percentiles(downs), 'key_up': percentiles(ups)}
+
+
+def bench_fire_chord(events):
+    """_fire_chord latency for every chord mask reached by a key stream."""
+    engine = ChordEngine()
+    masks = []
+    for key, is_down, _ in events:
+        if is_down:
+            engine.key_down(key)
+        else:
+            if engine.chord_active and engine.held_mask == KEY_BITS[key]:
+                masks.append(engine.chord_mask)
+            engine.key_up(key)
+    engine.reset()
+    samples = []
+    timestamp = 0.0
+    for mask in masks:
+        engine.chord_mask = mask
+        timestamp += 2.0  # Past the sequence timeout: every stroke starts fresh
+        t0 = perf_counter_ns()
+        engine._fire_chord(timestamp)
+        samples.append(perf_counter_ns() - t0)
+        if len(engine.token_buffer) > 1000:
+            engine.token_buffer.clear()
+    return {'fire_chord': percentiles(samples)}
+
+
+def bench_buffer(repeat):
+    """flush_buffer and get_buffer_display at increasing buffer sizes."""
+    tokens = [token for _, token in TOKEN_CHORDS.values()]
+    engine = ChordEngine()
+    results = {}
+    for size in BUFFER_SIZES:
+        fill = (tokens * (size // len(tokens) + 1))[:size]
+        display = []
+        flush = []
+        for _ in range(repeat):
+            engine.token_buffer[:] = fill
+            engine.text_buffer[:] = 'pending'
+            t0 = perf_counter_ns()
+            engine.get_buffer_display()
+            display.append(perf_counter_ns() - t0)
+            t0 = perf_counter_ns()
+            engine.flush_buffer()
+            flush.append(perf_counter_ns() - t0)
+        results[f'get_buffer_display[{size}]'] = percentiles(display)
+        results[f'flush_buffer[{size}]'] = percentiles(flush)
+    return results
+
+
+def bench_overlay(events, predictor):
+    """Completion ranking for every held-key state in a key stream."""
+    engine = ChordEngine()
+    masks = []
+    for key, is_down, timestamp in events:
+        if is_down:
+            engine.key_down(key, timestamp)
+            masks.append(engine.held_mask)
+        else:
+            engine.key_up(key, timestamp)
+            if engine.held_mask:
+                masks.append(engine.held_mask)
+    plain = []
+    ranked = []
+    context = ('I', 'WANT')
+    for mask in masks:
+        t0 = perf_counter_ns()
+        rank_completions(mask)
+        plain.append(perf_counter_ns() - t0)
+        t0 = perf_counter_ns()
+        rank_completions(mask, predictor.distribution(context))
+        ranked.append(perf_counter_ns() - t0)
+    return {'overlay_filter': percentiles(plain),
+            'overlay_filter_ranked': percentiles(ranked)}
+
+
+def bench_search(repeat, predictor):
+    """Search filtering over the full token index for a set of queries."""
+    results = {}
+    context = ('I', 'WANT')
+    for query in SEARCH_QUERIES:
+        plain = []
+        ranked = []
+        for _ in range(repeat):
+            t0 = perf_counter_ns()
+            search_tokens(TOKEN_INDEX, query)
+            plain.append(perf_counter_ns() - t0)
+            t0 = perf_counter_ns()
+            search_tokens(TOKEN_INDEX, query, predictor.distribution(context))
+            ranked.append(perf_counter_ns() - t0)
+        results[f'search[{query}]'] = percentiles(plain)
+        results[f'search_ranked[{query}]'] = percentiles(ranked)
+    return results
+
+
+def trained_predictor(events):
+    """NgramModel trained on the token stream the events produce."""
+    engine = ChordEngine()
+    tokens = [r[1] for r in engine.feed(events) if r[0] == 'token']
+    model = NgramModel()
+    for i in range(0, len(tokens), 8):
+        model.observe(tokens[i:i + 8])
+    return model
+
+
+# ==================== MAIN ====================
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--events', type=int, default=20000,
+                        help='synthetic chords to generate (default 20000)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=200,
+                        help='repetitions for buffer/search benchmarks')
+    parser.add_argument('--replay', help='replay key events from FILE')
+    parser.add_argument('--record', help='write the synthetic stream to FILE')
+    parser.add_argument('--json', help='write results to FILE as JSON')
+    args = parser.parse_args()
+
+    if args.replay:
+        events = read_stream(args.replay)
+        stream = {'kind': 'replay', 'path': args.replay, 'events': len(events)}
+    else:
+        events = synthetic_stream(args.events, args.seed)
+        stream = {'kind': 'synthetic', 'seed': args.seed, 'events': len(events)}
+        if args.record:
+            write_stream(args.record, events)
+
+    predictor = trained_predictor(events)
+    results = {}
+    results.update(bench_engine_events(events))
+    results.update(bench_fire_chord(events))
+    results.update(bench_buffer(args.repeat))
+    results.update(bench_overlay(events, predictor))
+    results.update(bench_search(args.repeat, predictor))
+
+    overhead = timer_overhead()
+    cols = ['n'] + [f'p{p:g}' for p in PERCENTILES] + ['max']
+    print(f"stream: {stream}  (timer overhead {overhead} ns, included below)")
+    print(f"{'benchmark':32}" + ''.join(f'{c:>10}' for c in cols))
+    for name, summary in results.items():
+        print(f"{name:32}" + ''.join(f'{summary[c]:>10}' for c in cols))
+
+    if args.json:
+        report = {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'stream': stream,
+            'timer_overhead_ns': overhead,
+            'unit': 'ns',
+            'results': results,
+        }
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.json}")
+
+
+if __name__ == '__main__':
+    main()
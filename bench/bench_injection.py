@@ -0,0 +1,118 @@
+"""Benchmark: injected keystrokes per second for each injection strategy.
+
+Usage:
+  python bench/bench_injection.py [--chars N] [--json FILE]
+  python bench/bench_injection.py --live [--chars N]
+
+Each strategy performs the same undo-style edit: delete N characters, then
+type N characters of replacement text.
+
+Always measured (safe, no keystrokes leave the process):
+  recording        RecordingInjector bookkeeping
+  sendinput-encode building the SendInput INPUT arrays for the edit
+
+With --live, keystrokes are really injected into the focused window, so
+focus a scratch editor during the countdown:
+  sendinput        one SendInput call per edit (Windows)
+  sendinput-64     SendInput in chunks of 64 events
+  pynput           pynput per key, no pacing
+  pynput-legacy    pynput per key, 10ms between backspaces (old behavior)
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from injection import (
+    RecordingInjector, SendInputInjector, PynputInjector, build_inputs, encode_edit,
+)
+
+
+def edit_text(n):
+    words = 'the quick brown fox jumps over the lazy dog '
+    return (words * (n // len(words) + 1))[:n]
+
+
+def measure(fn, keystrokes, repeat):
+    """Best-of-repeat keystrokes/sec for fn()."""
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return keystrokes / best, best
+
+
+def offline_strategies(n):
+    text = edit_text(n)
+    recorder = RecordingInjector()
+    recorder.text = text
+
+    def recording():
+        recorder.submit(n, text)
+
+    def sendinput_encode():
+        build_inputs(encode_edit(n, text))
+
+    return {'recording': recording, 'sendinput-encode': sendinput_encode}
+
+
+def live_strategies(n):
+    text = edit_text(n)
+    strategies = {}
+    if sys.platform == 'win32':
+        strategies['sendinput'] = SendInputInjector()
+        strategies['sendinput-64'] = SendInputInjector(chunk_size=64, pacing=0.001)
+    try:
+        strategies['pynput'] = PynputInjector(pacing=0.0)
+        strategies['pynput-legacy'] = PynputInjector(pacing=0.01)
+    except Exception as e:
+        print(f"pynput unavailable: {e}")
+
+    def run(injector):
+        # Type the text first so the edit's deletions have something to remove
+        injector.submit(0, text)
+        return lambda: injector.submit(n, text)
+    return {name: run(injector) for name, injector in strategies.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--chars', type=int, default=200,
+                        help='characters deleted and typed per edit (default 200)')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--live', action='store_true',
+                        help='inject real keystrokes into the focused window')
+    parser.add_argument('--json', help='write results to FILE as JSON')
+    args = parser.parse_args()
+
+    n = args.chars
+    keystrokes = 2 * n  # n backspaces + n characters
+    strategies = offline_strategies(n)
+    if args.live:
+        for i in range(3, 0, -1):
+            print(f"Injecting into the focused window in {i}...", flush=True)
+            time.sleep(1)
+        strategies.update(live_strategies(n))
+
+    results = {}
+    print(f"edit: {n} deletions + {n} chars ({keystrokes} keystrokes)")
+    for name, fn in strategies.items():
+        repeat = args.repeat if not name.startswith('pynput') else 1
+        rate, seconds = measure(fn, keystrokes, repeat)
+        results[name] = {'keystrokes_per_sec': rate, 'edit_seconds': seconds}
+        print(f"  {name:18} {rate:14,.0f} keys/s  {seconds * 1000:10.2f} ms/edit")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'chars': n, 'live': args.live, 'platform': sys.platform,
+                       'results': results}, f, indent=2)
+        print(f"Wrote {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""Benchmark: time to first character of an AI expansion, blocking vs streaming.
+
+Usage:
+  python bench/bench_streaming.py [--runs N] [--ttft MS] [--interval MS]
+                                  [--json FILE]
+
+Runs AIEngine (the real Groq client) against a local OpenAI-compatible stub
+server (bench/openai_stub.py) that simulates the time to first token and a
+steady token rate. For each mode it measures, from expand():
+  first_char  when the first output text is available to inject (first
+              on_chunk when streaming, on_result otherwise)
+  total       when on_result is called
+Needs the app's requirements (groq); no API key or network is used.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from openai_stub import StubServer
+
+
+def run_mode(stream, runs):
+    """(first_char, total) second lists for one engine mode."""
+    from ai_engine import AIEngine
+
+    first = []
+    total = []
+    state = {}
+    done = threading.Event()
+
+    def on_chunk(text, seq):
+        state.setdefault('first', time.perf_counter())
+
+    def on_result(text, seq):
+        state.setdefault('first', time.perf_counter())
+        state['total'] = time.perf_counter()
+        done.set()
+
+    def on_error(tokens, error, seq):
+        state['error'] = error
+        done.set()
+
+    engine = AIEngine(on_result, on_error, on_chunk=on_chunk, stream=stream)
+    engine.start()
+    try:
+        for _ in range(runs):
+            state.clear()
+            done.clear()
+            t0 = time.perf_counter()
+            engine.expand('CAN YOU SEND ME EMAIL ABOUT PROJECT')
+            done.wait(30)
+            if 'error' in state:
+                raise RuntimeError(state['error'])
+            first.append(state['first'] - t0)
+            total.append(state['total'] - t0)
+            engine.clear_context()
+    finally:
+        engine.stop()
+    return first, total
+
+
+def summary(samples):
+    samples = sorted(samples)
+    return {'p50_ms': 1000 * statistics.median(samples),
+            'p90_ms': 1000 * samples[min(len(samples) - 1, int(len(samples) * 0.9))],
+            'mean_ms': 1000 * statistics.fmean(samples)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--ttft', type=float, default=300, help='stub time to first token (ms)')
+    parser.add_argument('--interval', type=float, default=20, help='stub ms between chunks')
+    parser.add_argument('--json', help='write results to FILE as JSON')
+    args = parser.parse_args()
+
+    stub = StubServer(args.ttft / 1000, args.interval / 1000).start()
+    # Read by config.get_groq_api_key and the Groq client
+    os.environ['GROQ_API_KEY'] = 'bench'
+    os.environ['GROQ_BASE_URL'] = stub.url
+
+    print(f"stub: ttft {args.ttft:g} ms, {len(stub.pieces())} chunks every "
+          f"{args.interval:g} ms, {len(stub.text)} chars")
+    results = {}
+    for name, stream in (('blocking', False), ('streaming', True)):
+        first, total = run_mode(stream, args.runs)
+        results[name] = {'first_char': summary(first), 'total': summary(total)}
+        print(f"  {name:10} first char p50 {results[name]['first_char']['p50_ms']:8.1f} ms"
+              f"   total p50 {results[name]['total']['p50_ms']:8.1f} ms")
+    stub.stop()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'runs': args.runs, 'ttft_ms': args.ttft, 'interval_ms': args.interval,
+                       'results': results}, f, indent=2)
+        print(f"Wrote {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""Local OpenAI-compatible chat completions stub for the AI benchmarks.
+
+Answers POST .../chat/completions (the path the Groq client uses under its
+base URL) with a fixed completion, after a simulated time to first token.
+stream=true requests get Server-Sent Events, one `chunk_chars` piece every
+`chunk_interval` seconds; other requests get the whole completion once the
+same total generation time has passed. GET .../models answers at once.
+
+With tls=True it serves HTTPS with a self-signed certificate for 127.0.0.1,
+made with the openssl command line tool; clients trust it through
+SSL_CERT_FILE=stub.cert_file. connect_delay is slept before each new
+connection is served, standing in for DNS, TCP and TLS round trips to a
+remote API, and connections idle for idle_timeout seconds are closed, as
+servers and load balancers do.
+
+Usage as a standalone server:
+  python bench/openai_stub.py [--port P] [--ttft MS] [--interval MS] [--tls]
+"""
+
+import argparse
+import json
+import os
+import socket
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_TEXT = ("Can you send me an email about the project before the "
+                "meeting tomorrow? I want to check the report first.")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like the real API
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        stub = self.server.stub
+        stub.connections += 1
+        time.sleep(stub.connect_delay)
+        # Headers and body go out in separate writes: don't let Nagle hold
+        # the body for the client's delayed ACK
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if stub.ssl_context is not None:
+            self.request = stub.ssl_context.wrap_socket(self.request, server_side=True)
+        self.timeout = stub.idle_timeout
+        super().setup()
+
+    def do_GET(self):
+        if not self.path.endswith('/models'):
+            self.send_error(404)
+            return
+        self.server.stub.requests += 1
+        data = {'object': 'list', 'data': [{'id': 'stub', 'object': 'model', 'created': 0,
+                                            'owned_by': 'stub', 'active': True}]}
+        self._send_json(data)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if not self.path.endswith('/chat/completions'):
+            self.send_error(404)
+            return
+        request = json.loads(body or b'{}')
+        stub = self.server.stub
+        stub.requests += 1
+        time.sleep(stub.ttft)
+        pieces = stub.pieces()
+        if request.get('stream'):
+            try:
+                self._stream(request, pieces)
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True  # Client aborted the stream
+        else:
+            time.sleep(stub.chunk_interval * (len(pieces) - 1))
+            self._respond(request, ''.join(pieces))
+
+    def _base(self, request, kind):
+        return {'id': 'chatcmpl-stub', 'object': kind, 'created': int(time.time()),
+                'model': request.get('model', 'stub')}
+
+    def _respond(self, request, text):
+        data = self._base(request, 'chat.completion')
+        data['choices'] = [{'index': 0, 'finish_reason': 'stop',
+                            'message': {'role': 'assistant', 'content': text}}]
+        data['usage'] = {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}
+        self._send_json(data)
+
+    def _send_json(self, data):
+        payload = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _stream(self, request, pieces):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for i, piece in enumerate(pieces):
+            if i:
+                time.sleep(self.server.stub.chunk_interval)
+            data = self._base(request, 'chat.completion.chunk')
+            data['choices'] = [{'index': 0, 'finish_reason': None,
+                                'delta': {'role': 'assistant', 'content': piece}}]
+            self._write_chunk(f'data: {json.dumps(data)}\n\n')
+        self._write_chunk('data: [DONE]\n\n')
+        self._write_chunk('')  # Terminating zero-length chunk
+
+    def _write_chunk(self, text):
+        data = text.encode()
+        self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+        self.wfile.flush()
+
+
+def _self_signed(directory):
+    """(cert, key) file paths of a new certificate for 127.0.0.1."""
+    cert = os.path.join(directory, 'stub-cert.pem')
+    key = os.path.join(directory, 'stub-key.pem')
+    subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes',
+                    '-keyout', key, '-out', cert, '-days', '1', '-subj', '/CN=127.0.0.1',
+                    '-addext', 'subjectAltName=IP:127.0.0.1'],
+                   check=True, capture_output=True)
+    return cert, key
+
+
+class StubServer:
+    """Threaded stub server on 127.0.0.1; url is its base URL once started."""
+
+    def __init__(self, ttft=0.3, chunk_interval=0.02, chunk_chars=4, text=DEFAULT_TEXT, port=0,
+                 tls=False, connect_delay=0.0, idle_timeout=None):
+        self.ttft = ttft
+        self.chunk_interval = chunk_interval
+        self.chunk_chars = chunk_chars
+        self.text = text
+        self.connect_delay = connect_delay
+        self.idle_timeout = idle_timeout
+        self.requests = 0
+        self.connections = 0
+        self.ssl_context = None
+        self.cert_file = None
+        if tls:
+            self._tmp = tempfile.TemporaryDirectory()
+            self.cert_file, key = _self_signed(self._tmp.name)
+            self.ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+            self.ssl_context.load_cert_chain(self.cert_file, key)
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        scheme = 'https' if tls else 'http'
+        self.url = f'{scheme}://127.0.0.1:{self._server.server_address[1]}'
+
+    def pieces(self):
+        n = self.chunk_chars
+        return [self.text[i:i + n] for i in range(0, len(self.text), n)]
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--ttft', type=float, default=300, help='time to first token (ms)')
+    parser.add_argument('--interval', type=float, default=20, help='ms between chunks')
+    parser.add_argument('--tls', action='store_true', help='serve HTTPS (self-signed)')
+    args = parser.parse_args()
+    stub = StubServer(args.ttft / 1000, args.interval / 1000, port=args.port, tls=args.tls)
+    print(f"Serving on {stub.url} (GROQ_BASE_URL={stub.url})")
+    if stub.cert_file:
+        print(f"  SSL_CERT_FILE={stub.cert_file}")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
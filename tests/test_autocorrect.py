@@ -0,0 +1,33 @@
+"""Autocorrect never turns a near-miss control chord into a token."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from autocorrect import CORRECT_COMMIT, ChordCorrector
+from chord_engine import ChordEngine
+
+
+def _stroke(engine, keys, timestamp):
+    for key in keys:
+        engine.key_down(key, timestamp)
+    result = None
+    for key in keys:
+        result = engine.key_up(key, timestamp + 0.05) or result
+    return result
+
+
+def test_send_chord_with_a_finger_missing_commits_nothing():
+    engine = ChordEngine(corrector=ChordCorrector(mode=CORRECT_COMMIT))
+    all_keys = ['a', 's', 'd', 'f', 'c', 'm', 'j', 'k', 'l', ';']
+    for i, missing in enumerate(all_keys):
+        keys = [key for key in all_keys if key != missing]
+        assert _stroke(engine, keys, i * 0.2) == ('invalid',)
+    assert engine.token_buffer == []
+
+
+def test_near_miss_token_is_still_corrected():
+    engine = ChordEngine(corrector=ChordCorrector(mode=CORRECT_COMMIT))
+    # A+D+S+; (RUN) with F added: one finger from RUN only
+    assert _stroke(engine, ['a', 's', 'd', 'f', ';'], 0.0) == ('token', 'RUN')
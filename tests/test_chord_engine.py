@@ -0,0 +1,27 @@
+"""Chord engine: what strokes commit."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from chord_engine import ChordEngine
+
+
+def _stroke(engine, chord, timestamp):
+    """Press and release every key of chord; returns the fired result."""
+    keys = chord.lower().split('+')
+    for key in keys:
+        engine.key_down(key, timestamp)
+    result = None
+    for key in keys:
+        result = engine.key_up(key, timestamp + 0.05) or result
+    return result
+
+
+def test_common_bigrams_type_literally():
+    engine = ChordEngine()
+    results = [_stroke(engine, chord, i * 0.2)
+               for i, chord in enumerate(['A+S+K', 'S+F+M+J+;', 'A+D+J', 'D+F+M+;'])]
+    assert results == [('token', 'TELL'), ('token', 'ME'), ('token', 'NOW'), ('token', 'URGENT')]
+    assert engine.token_buffer == ['TELL', 'ME', 'NOW', 'URGENT']
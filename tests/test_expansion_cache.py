@@ -0,0 +1,21 @@
+"""Expansion cache persistence."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from expansion_cache import ExpansionCache
+
+
+def test_bare_filename_persists(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cache = ExpansionCache('cache.db', max_entries=10)
+    cache.open()
+    cache.put('key', 'Expanded text.')
+    cache.close()
+
+    reopened = ExpansionCache('cache.db', max_entries=10)
+    reopened.open()
+    assert reopened.get('key') == 'Expanded text.'
+    reopened.close()
@@ -0,0 +1,51 @@
+"""In-flight expansions: a result that can't be typed still retires."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+import keyboard_hook
+from chord_engine import ChordEngine
+from event_sources import ReplaySource
+from expansions import PendingExpansions
+from injection import RecordingInjector
+from keyboard_hook import KeyboardHook
+
+
+class FailingInjector(RecordingInjector):
+    """Refuses every batch, like SendInput blocked by UIPI."""
+
+    def _submit(self, deletions, text):
+        raise OSError("SendInput blocked")
+
+    def _tap(self, key):
+        raise OSError("SendInput blocked")
+
+
+def _noop(*args):
+    pass
+
+
+def test_failed_injection_retires_request_and_releases_held_keys():
+    keyboard_hook.set_injector(FailingInjector())
+    engine = ChordEngine()
+    hook = KeyboardHook(engine, *[_noop] * 8, source=ReplaySource([]))
+    delivered = []
+    pending = PendingExpansions(engine, hook, on_delivered=lambda *args: delivered.append(args))
+    first = pending.add('MAKE CODE')
+    first['seq'] = 0
+    second = pending.add('FIX TEST')
+    second['seq'] = 1
+    hook.hold(('enter',))
+
+    pending.deliver('Write the code.', 0)
+    assert len(pending) == 1 and hook.in_flight == 1
+    assert delivered[0][0] is first and 'SendInput blocked' in delivered[0][2]
+
+    # The next result isn't stuck behind the failed one
+    keyboard_hook.set_injector(RecordingInjector())
+    pending.deliver('Fix the test.', 1)
+    assert delivered[1] == (second, 'Fix the test.', None)
+    assert hook.in_flight == 0
+    assert not hook.converting and hook._held == []
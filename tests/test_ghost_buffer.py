@@ -0,0 +1,45 @@
+"""Ghost-buffer text mode: typed characters stay off-screen until flushed."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+import keyboard_hook
+from chord_engine import ChordEngine
+from config import VK_SPACE
+from event_sources import ReplaySource
+from injection import RecordingInjector
+from keyboard_hook import KeyboardHook
+
+
+def _noop(*args):
+    pass
+
+
+def test_ghost_text_mode_keeps_spaces():
+    injector = RecordingInjector()
+    keyboard_hook.set_injector(injector)
+    engine = ChordEngine()
+    engine.mode = 'text'
+    events = []
+    for i, vk in enumerate([ord('A'), ord('B'), VK_SPACE, ord('C'), ord('D')]):
+        events.append((vk, True, i * 0.1))
+        events.append((vk, False, i * 0.1 + 0.05))
+    source = ReplaySource(events)
+    hook = KeyboardHook(engine, *[_noop] * 8, source=source, ghost=True)
+    hook.enabled = True
+    hook.start()
+    assert source.done.wait(5)
+
+    # Every key, space included, is held back in the buffer
+    assert all(suppressed for _, _, suppressed, _ in source.results)
+    assert engine.buffer_text() == 'ab cd'
+
+    # Turning the keyboard off types the pending text in one batch
+    hook.toggle()  # Text mode: back to semantic first
+    hook.toggle()
+    hook.stop()
+    hook._worker.join(5)
+    assert injector.batches == [('edit', 0, 'ab cd')]
+    assert injector.text == 'ab cd'
@@ -0,0 +1,29 @@
+"""Output queue: only overlay updates are dropped when it is full."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+import keyboard_hook
+from chord_engine import ChordEngine
+from event_sources import ReplaySource
+from keyboard_hook import KeyboardHook
+
+
+def _noop(*args):
+    pass
+
+
+def test_full_queue_keeps_tokens_and_edits(monkeypatch):
+    monkeypatch.setattr(keyboard_hook, 'POST_BLOCK_TIMEOUT', 0.0)
+    hook = KeyboardHook(ChordEngine(), *[_noop] * 8, source=ReplaySource([]))
+    # Worker not started: nothing drains the queue
+    for i in range(keyboard_hook.ACTION_QUEUE_SIZE + 10):
+        hook._post(('chord', ('token', f'T{i}'), False))
+    hook.run_edit(_noop)
+    hook._post(('keys', frozenset()))
+
+    assert hook.dropped == 1
+    assert hook._actions.qsize() == keyboard_hook.ACTION_QUEUE_SIZE + 11
+    assert hook._edits_posted == 1
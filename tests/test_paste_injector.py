@@ -0,0 +1,27 @@
+"""Paste injection borrows the clipboard only when it holds plain text."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from clipboard import MemoryClipboard
+from injection import PasteInjector, RecordingInjector
+
+
+def test_pastes_and_restores_text():
+    clipboard = MemoryClipboard('saved')
+    inner = RecordingInjector(clipboard)
+    injector = PasteInjector(inner, clipboard, threshold=4, restore_delay=0)
+    injector.submit(2, 'long output')
+    assert inner.batches == [('edit', 2, ''), ('paste', 'long output')]
+    assert clipboard.text == 'saved'
+
+
+def test_types_when_clipboard_holds_other_data():
+    clipboard = MemoryClipboard('caption', non_text=True)
+    inner = RecordingInjector(clipboard)
+    injector = PasteInjector(inner, clipboard, threshold=4, restore_delay=0)
+    injector.submit(2, 'long output')
+    assert inner.batches == [('edit', 2, 'long output')]
+    assert clipboard.history == []
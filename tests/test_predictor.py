@@ -0,0 +1,36 @@
+"""N-gram model persistence and size cap."""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from predictor import NgramModel
+
+
+def test_saves_append_and_reload(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    model = NgramModel('ngrams.json')  # Bare filename: no directory to create
+    model.observe(['MAKE', 'CODE'])
+    model.save()
+    model.observe(['MAKE', 'TEST'])
+    model.save()
+
+    with open('ngrams.json', encoding='utf-8') as f:
+        lines = [json.loads(line) for line in f]
+    assert lines[0]['order'] == 3
+    assert lines[1:] == [{'observe': ['MAKE', 'TEST']}]
+
+    loaded = NgramModel('ngrams.json')
+    loaded.load()
+    assert loaded.distribution(['MAKE']) == model.distribution(['MAKE'])
+
+
+def test_table_is_capped():
+    model = NgramModel(max_ngrams=50)
+    for i in range(200):
+        model.observe(['COMMON', f'RARE{i}'])
+    entries = sum(len(following) for following in model._counts.values())
+    assert entries <= 50 * 1.25
+    assert model.score([], 'COMMON') > 0
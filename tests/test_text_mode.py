@@ -0,0 +1,49 @@
+"""Text mode while an expansion is in flight: keys are typed by the worker."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+import keyboard_hook
+from chord_engine import ChordEngine
+from config import VK_SPACE
+from event_sources import ReplaySource
+from injection import RecordingInjector
+from keyboard_hook import KeyboardHook
+
+VK_RETURN = 0x0D
+VK_HOME = 0x24
+
+
+def _noop(*args):
+    pass
+
+
+def test_text_mode_keys_wait_for_in_flight_expansion():
+    injector = RecordingInjector()
+    keyboard_hook.set_injector(injector)
+    engine = ChordEngine()
+    engine.mode = 'text'
+    events = []
+    for i, vk in enumerate([ord('A'), VK_SPACE, VK_RETURN, ord('B'), VK_HOME]):
+        events.append((vk, True, i * 0.1))
+        events.append((vk, False, i * 0.1 + 0.05))
+    source = ReplaySource(events)
+    callbacks = [_noop] * 8
+    callbacks[6] = KeyboardHook.send_enter  # on_enter
+    hook = KeyboardHook(engine, *callbacks, source=source)
+    hook.enabled = True
+    hook.in_flight = 1
+    hook.start()
+    assert source.done.wait(5)
+
+    # Nothing reaches the app directly; the worker types the text keys, and
+    # holds Enter and every key after it until the expansion has landed
+    assert all(suppressed for _, _, suppressed, _ in source.results)
+    hook.run_edit(lambda: setattr(hook, 'in_flight', 0) or hook.settle())
+    hook.stop()
+    hook._worker.join(5)
+    assert engine.buffer_text() == 'a b'
+    assert injector.batches == [('edit', 0, 'a'), ('edit', 0, ' '),
+                                ('tap', 'enter'), ('edit', 0, 'b'), ('tap', VK_HOME)]
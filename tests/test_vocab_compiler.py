@@ -0,0 +1,21 @@
+"""Vocabulary artifact: keyed on the contents of the table it was built from."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from chord_engine import _compile_entries
+from vocab_compiler import read_artifact, vocab_key, write_artifact
+
+
+def test_artifact_round_trip_and_staleness(tmp_path):
+    semantics = {'A+J': 'FIRST', 'S+K': 'SECOND'}
+    path = str(tmp_path / 'vocab.bin')
+    entries = _compile_entries(semantics)
+    write_artifact(path, entries, vocab_key(semantics))
+
+    # An equal table (e.g. after a checkout touched the file) still matches
+    assert read_artifact(path, vocab_key(dict(semantics))) == entries
+    assert read_artifact(path, vocab_key({**semantics, 'D+L': 'THIRD'})) is None
+    assert read_artifact(str(tmp_path / 'missing.bin'), vocab_key(semantics)) is None